@@ -0,0 +1,153 @@
+"""
+`framebuf.py`
+====================================================
+
+Pure Python stand-in for the CircuitPython framebuf module, MONO_VLSB only.
+
+Used by the headless host backend, and picked up by the game modules when
+the built in framebuf isn't available. Drawing works a byte (8 pixel page)
+at a time where it can, so the game runs at a usable speed on a PC.
+
+The 8x8 font isn't shipped, so text() draws each character other than a
+space as a 6x6 box in its 8x8 cell. Text covers the same area as on the
+badge but isn't readable in screen dumps.
+* Author(s): Kevin Neubauer
+"""
+MONO_VLSB = 0
+MVLSB = MONO_VLSB
+
+class FrameBuffer:
+    def __init__(self, buf, width, height, buf_format = MONO_VLSB, stride = None):
+        if (buf_format != MONO_VLSB):
+            raise ValueError("only MONO_VLSB is supported")
+        self.buf = buf
+        self.width = width
+        self.height = height
+        self.stride = width if stride is None else stride
+        self.pages = (height + 7) // 8
+        if (len(buf) < self.pages * self.stride):
+            raise ValueError("buffer too small") # As the built in framebuf checks
+
+    def pixel(self, x, y, c = None):
+        if (x < 0 or y < 0 or x >= self.width or y >= self.height):
+            return None
+        i = (y >> 3) * self.stride + x
+        mask = 1 << (y & 7)
+        if (c is None):
+            return 1 if self.buf[i] & mask else 0
+        if (c):
+            self.buf[i] |= mask
+        else:
+            self.buf[i] &= ~mask & 0xFF
+
+    def fill(self, c):
+        row = bytes((0xFF if c else 0x00,)) * self.width
+        for page in range(self.pages):
+            start = page * self.stride
+            self.buf[start:start + self.width] = row
+
+    def fill_rect(self, x, y, w, h, c):
+        x0 = max(x, 0)
+        x1 = min(x + w, self.width)
+        y0 = max(y, 0)
+        y1 = min(y + h, self.height)
+        if (x0 >= x1 or y0 >= y1):
+            return
+        buf = self.buf
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            top = max(y0 - page * 8, 0)
+            bottom = min(y1 - page * 8, 8)
+            mask = ((1 << bottom) - 1) & ~((1 << top) - 1)
+            start = page * self.stride
+            if (mask == 0xFF):
+                buf[start + x0:start + x1] = bytes((0xFF if c else 0x00,)) * (x1 - x0)
+            elif (c):
+                for i in range(start + x0, start + x1):
+                    buf[i] |= mask
+            else:
+                mask = ~mask & 0xFF
+                for i in range(start + x0, start + x1):
+                    buf[i] &= mask
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c):
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while (True):
+            self.pixel(x0, y0, c)
+            if (x0 == x1 and y0 == y1):
+                return
+            e2 = 2 * err
+            if (e2 >= dy):
+                err += dy
+                x0 += sx
+            if (e2 <= dx):
+                err += dx
+                y0 += sy
+
+    def scroll(self, dx, dy):
+        copy = FrameBuffer(bytearray(self.pages * self.width), self.width, self.height)
+        copy.blit(self, 0, 0)
+        self.blit(copy, dx, dy)
+
+    def text(self, s, x, y, c = 1):
+        for i in range(len(s)):
+            if (s[i] != " "):
+                self.fill_rect(x + i * 8 + 1, y + 1, 6, 6, c)
+
+    def blit(self, fbuf, x, y, key = -1, palette = None):
+        # Works a column at a time, a column of either buffer held as one int
+        sw = fbuf.width
+        sh = fbuf.height
+        sx0 = max(0, -x)
+        sx1 = min(sw, self.width - x)
+        if (sx0 >= sx1 or y >= self.height or y + sh <= 0):
+            return
+        if (y >= 0):
+            region = ((1 << sh) - 1) << y
+        else:
+            region = ((1 << sh) - 1) >> -y
+        region &= (1 << self.height) - 1
+        firstPage = (max(y, 0)) >> 3
+        lastPage = (min(y + sh, self.height) - 1) >> 3
+        src = fbuf.buf
+        sstride = fbuf.stride
+        dst = self.buf
+        dstride = self.stride
+        for sx in range(sx0, sx1):
+            col = 0
+            for page in range(fbuf.pages):
+                col |= src[page * sstride + sx] << (page * 8)
+            if (y >= 0):
+                col <<= y
+            else:
+                col >>= -y
+            dx = x + sx
+            dcol = 0
+            for page in range(firstPage, lastPage + 1):
+                dcol |= dst[page * dstride + dx] << (page * 8)
+            if (key == -1):
+                dcol = (dcol & ~region) | (col & region)
+            elif (key == 0):
+                dcol |= col & region
+            else:
+                dcol &= ~(region & ~col)
+            for page in range(firstPage, lastPage + 1):
+                dst[page * dstride + dx] = (dcol >> (page * 8)) & 0xFF
+
+def FrameBuffer1(buf, width, height, stride = None):
+    return FrameBuffer(buf, width, height, MONO_VLSB, stride)
@@ -0,0 +1,219 @@
+"""
+`hardware.py`
+====================================================
+
+Headless stand-ins for the badge hardware, used by HostBackend.
+
+They behave closely enough to the CircuitPython objects for the game to run
+unchanged, and count what is sent to them: bytes and transactions on the
+I2C bus, sounds played and NeoPixel updates. Time comes from VirtualClock,
+so a game running on them goes as fast as the host CPU allows.
+* Author(s): Kevin Neubauer
+"""
+import asyncio
+import math
+import selectors
+import struct
+
+NS_PER_SEC = 1000000000
+EPOCH = 1577836800 # Wall clock time the virtual clock starts at, 2020-01-01
+
+class VirtualClock:
+    """
+    Simulated time for running the game on a PC. Coroutines run with run()
+    go on an event loop that reads the time from this clock, and instead of
+    waiting for the next timer moves the clock forward to it, so sleeps take
+    no real time but tasks still wake in the order they would on the badge.
+    """
+    def __init__(self, start = 0):
+        self.ns = start #Nanoseconds since the clock started
+
+    def monotonic(self):
+        return self.ns / NS_PER_SEC
+
+    def monotonic_ns(self):
+        return self.ns
+
+    def time(self):
+        return EPOCH + self.ns // NS_PER_SEC
+
+    #function to move the clock forward, e.g. to charge for a slow frame
+    def advance(self, seconds):
+        self.ns += int(seconds * NS_PER_SEC)
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    #function that runs coroutine to completion on virtual time
+    def run(self, coroutine):
+        loop = _VirtualEventLoop(self)
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+class _VirtualSelector(selectors.DefaultSelector):
+    # The event loop waits for its next timer in select(), skip the wait
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout = None):
+        if (timeout is not None and timeout > 0):
+            # Round up, falling short by a fraction of a ns would stall the loop
+            self.clock.ns += max(1, math.ceil(timeout * NS_PER_SEC))
+        return super().select(0)
+
+class _VirtualEventLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock):
+        super().__init__(_VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self):
+        return self.clock.ns / NS_PER_SEC
+
+class RecordingI2C:
+    """
+    busio.I2C stand-in that counts writes, and keeps them in log if record is set
+    """
+    def __init__(self, record = False):
+        self.record = record
+        self.log = [] #(address, bytes) of each write when recording
+        self.bytes_written = 0 #Bytes written including the address byte
+        self.transactions = 0
+        self._locked = False
+
+    def try_lock(self):
+        if (self._locked):
+            return False
+        self._locked = True
+        return True
+
+    def unlock(self):
+        self._locked = False
+
+    def writeto(self, address, buffer, *, start = 0, end = None):
+        if (end is None):
+            end = len(buffer)
+        self.bytes_written += end - start + 1
+        self.transactions += 1
+        if (self.record):
+            self.log.append((address, bytes(buffer[start:end])))
+
+    def reset(self):
+        self.log = []
+        self.bytes_written = 0
+        self.transactions = 0
+
+class HostPad:
+    """
+    gamepad.GamePad stand-in, set held to the bit mask of buttons held down
+    """
+    def __init__(self):
+        self.held = 0
+        self._latched = 0
+
+    #function to tap buttons, seen by the next get_pressed() even if released first
+    def tap(self, buttons):
+        self._latched |= buttons
+
+    def get_pressed(self):
+        buttons = self.held | self._latched
+        self._latched = 0
+        return buttons
+
+class HostPin:
+    """
+    digitalio.DigitalInOut stand-in for an output
+    """
+    def __init__(self, value = False):
+        self.value = value
+
+    def switch_to_output(self, value = False):
+        self.value = value
+
+class HostWaveFile:
+    """
+    audiocore.WaveFile stand-in, reads the header for the sound's length
+    """
+    def __init__(self, file, buffer = None):
+        self.sample_rate = 8000
+        self.duration = 0
+        header = file.read(512)
+        file.close()
+        if (header[:4] != b"RIFF" or header[8:12] != b"WAVE"):
+            return
+        offset = 12
+        byteRate = 0
+        while (offset + 8 <= len(header)):
+            chunk, size = struct.unpack_from("<4sI", header, offset)
+            if (chunk == b"fmt "):
+                self.sample_rate, byteRate = struct.unpack_from("<II", header, offset + 12)
+            elif (chunk == b"data"):
+                if (byteRate):
+                    self.duration = size / byteRate
+                return
+            offset += 8 + size + (size & 1)
+
+class HostRawSample:
+    """
+    audiocore.RawSample stand-in
+    """
+    def __init__(self, buffer, *, channel_count = 1, sample_rate = 8000):
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.duration = len(buffer) / sample_rate
+
+class HostAudioOut:
+    """
+    audioio.AudioOut stand-in, a sound plays for its duration on clock
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.sample = None
+        self.loop = False
+        self.plays = 0 #Sounds started
+        self._end = 0
+
+    @property
+    def playing(self):
+        if (self.sample is None):
+            return False
+        if (self.loop or self.clock.monotonic_ns() < self._end):
+            return True
+        self.sample = None
+        return False
+
+    def play(self, sample, *, loop = False):
+        self.sample = sample
+        self.loop = loop
+        self.plays += 1
+        self._end = self.clock.monotonic_ns() + int(sample.duration * NS_PER_SEC)
+
+    def stop(self):
+        self.sample = None
+
+    def deinit(self):
+        self.stop()
+
+class HostPixels:
+    """
+    neopixel.NeoPixel stand-in
+    """
+    def __init__(self, count):
+        self.pixels = [(0, 0, 0)] * count
+        self.writes = 0 #Updates sent to the strip
+
+    def __len__(self):
+        return len(self.pixels)
+
+    def __getitem__(self, index):
+        return self.pixels[index]
+
+    def __setitem__(self, index, color):
+        self.pixels[index] = color
+        self.writes += 1
+
+    def fill(self, color):
+        self.pixels = [color] * len(self.pixels)
+        self.writes += 1
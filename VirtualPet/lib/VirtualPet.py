@@ -25,24 +25,26 @@
 CircuitPython virtual pet class for virtual pet game
 * Author(s): Kevin Neubauer
 """
+import math
+
 class VirtualPet:
     agingRate = 0.00025
     healthRate = 0.005
     poopHealthMultiplier = 0.01
 
     sleepRate = {
-		'hunger': 0.001,
-		'poop': 0.001,
-		'happiness': 0.001,
-		'discipline': 0.001
-	}
+        'hunger': 0.001,
+        'poop': 0.001,
+        'happiness': 0.001,
+        'discipline': 0.001
+    }
 
     awakeRate = {
-		'hunger': 0.005,
-		'poop': 0.005,
-		'happiness': 0.005,
-		'discipline': 0.005	
-	}
+        'hunger': 0.005,
+        'poop': 0.005,
+        'happiness': 0.005,
+        'discipline': 0.005
+    }
 
     def __init__(self):
         self.hunger = 100
@@ -56,47 +58,113 @@ class VirtualPet:
         self.dead = False
 
     def decrementHunger(self):
-    	if (self.awake):
-    		self.hunger -= self.awakeRate["hunger"]
-    	else:
-    		self.hunger -= self.sleepRate["hunger"]
+        if (self.awake):
+            self.hunger -= self.awakeRate["hunger"]
+        else:
+            self.hunger -= self.sleepRate["hunger"]
 
     def decrementHappiness(self):
- 		if (self.awake):
- 			self.happiness -= self.awakeRate["happiness"]
-		else:
-			self.happiness -= self.sleepRate["happiness"]
+        if (self.awake):
+            self.happiness -= self.awakeRate["happiness"]
+        else:
+            self.happiness -= self.sleepRate["happiness"]
 
     def decrementDiscipline(self):
-		if (self.awake):
-			self.discipline -= self.awakeRate["discipline"]
-		else:
-			self.discipline -= self.sleepRate["discipline"]
+        if (self.awake):
+            self.discipline -= self.awakeRate["discipline"]
+        else:
+            self.discipline -= self.sleepRate["discipline"]
 
     def incrementPoopLevel(self):
-		if (self.awake):
-			self.poopLevel += self.awakeRate["poop"]
-		else:
-			self.poopLevel += self.sleepRate["poop"]
+        if (self.awake):
+            self.poopLevel += self.awakeRate["poop"]
+        else:
+            self.poopLevel += self.sleepRate["poop"]
 
     def incrementAge(self):
-		self.age += self.agingRate
+        self.age += self.agingRate
 
     def decrementHealth(self):
-		self.health -= (self.healthRate + (self.countPoops() * self.poopHealthMultiplier))
+        self.health -= (self.healthRate + (self.countPoops() * self.poopHealthMultiplier))
 
     def countPoops(self):
-		return int(self.poopLevel/10)
+        return int(self.poopLevel/10)
 
     def checkOverallHealth(self):
-		if (self.hunger <= 0 or self.health <= 0 or self.happiness <= 0):
-			self.dead = True
+        if (self.hunger <= 0 or self.health <= 0 or self.happiness <= 0):
+            self.dead = True
 
     def lifeTick(self):
-    	self.decrementHunger()
-    	self.decrementHappiness()
-    	self.decrementDiscipline()
-    	self.incrementPoopLevel()
-    	self.incrementAge()
-    	self.decrementHealth()
-    	self.checkOverallHealth()
\ No newline at end of file
+        self.decrementHunger()
+        self.decrementHappiness()
+        self.decrementDiscipline()
+        self.incrementPoopLevel()
+        self.incrementAge()
+        self.decrementHealth()
+        self.checkOverallHealth()
+
+    def advance(self, ticks):
+        """
+        Fast forward the pet by up to ticks life ticks in closed form.
+
+        Every stat changes linearly except health, whose rate depends on
+        countPoops(). Ticks are therefore applied in segments that end when
+        poopLevel crosses the next multiple of 10 or a stat reaches zero, so
+        the cost grows with the number of poops rather than with ticks.
+
+        Matches calling lifeTick() ticks times, stopping on the tick the pet
+        dies, to within float rounding. Linear stats agree to about 1e-11
+        per thousand ticks. lifeTick() reaches poopLevel by repeated
+        addition, so a poop boundary that falls exactly on a tick (as it
+        does with the default rates) can be seen one tick later there. Each
+        such boundary leaves health up to poopHealthMultiplier apart, which
+        in turn can move the tick the pet dies on by one.
+
+        :param int ticks: The number of life ticks to apply
+        :return: The number of ticks applied, less than ticks only if the pet died
+        """
+        if (self.awake):
+            rates = self.awakeRate
+        else:
+            rates = self.sleepRate
+        hungerRate = rates["hunger"]
+        happinessRate = rates["happiness"]
+        disciplineRate = rates["discipline"]
+        poopRate = rates["poop"]
+
+        done = 0
+        while (done < ticks and not self.dead):
+            steps = ticks - done
+
+            # Poop count seen by decrementHealth on the next tick, constant
+            # until poopLevel reaches the next multiple of 10
+            poops = int((self.poopLevel + poopRate)/10)
+            if (poopRate > 0):
+                boundary = math.ceil((10 * (poops + 1) - self.poopLevel) / poopRate)
+                steps = min(steps, max(1, boundary - 1))
+            healthDrop = self.healthRate + (poops * self.poopHealthMultiplier)
+
+            # Stop on the tick the first stat reaches zero
+            steps = min(steps,
+                        self._ticksUntilEmpty(self.hunger, hungerRate, steps),
+                        self._ticksUntilEmpty(self.happiness, happinessRate, steps),
+                        self._ticksUntilEmpty(self.health, healthDrop, steps))
+
+            self.hunger -= steps * hungerRate
+            self.happiness -= steps * happinessRate
+            self.discipline -= steps * disciplineRate
+            self.poopLevel += steps * poopRate
+            self.age += steps * self.agingRate
+            self.health -= steps * healthDrop
+            done += steps
+            self.checkOverallHealth()
+
+        return done
+
+    # Number of ticks until value falls to zero at rate per tick, capped at limit
+    def _ticksUntilEmpty(self, value, rate, limit):
+        if (rate <= 0):
+            return limit
+        if (value <= 0):
+            return 1
+        return min(limit, max(1, math.ceil(value / rate)))
@@ -0,0 +1,143 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetAtlas.py`
+====================================================
+
+Sprite atlas for virtual pet game: every .bin and .rle sprite packed into
+one file, so drawing doesn't have to look up and open a file per sprite.
+
+Layout, little endian:
+
+    header   magic "VPA1", sprite count (H)
+    index    per sprite: offset (I), size (H), name length (B), name
+    data     the sprite files back to back, each with its own header
+
+Sprites are named by the path the game draws them from, e.g.
+"VirtualPet/assets/poo.bin". Build the atlas with tools/build_atlas.py
+after regenerating the sprites with tools/txt2bin.py.
+
+The atlas file is kept open. On the host it is memory mapped and packed
+sprites are handed out as memoryview slices of the map, with no copy. On
+the badge there is no mmap, so a sprite is read by seeking the one open
+file and calling readinto. Run length encoded sprites are decoded into a
+new buffer either way.
+* Author(s): Kevin Neubauer
+"""
+import struct
+import VirtualPet.lib.VirtualPetSprite as VPS
+try:
+    import mmap
+except ImportError:
+    mmap = None # CircuitPython, sprites are read with readinto
+
+ATLASFILE = "VirtualPet/sprites.atlas"
+MAGIC = b"VPA1"
+HEADERFORMAT = "<4sH"
+HEADERSIZE = struct.calcsize(HEADERFORMAT)
+ENTRYFORMAT = "<IHB"
+ENTRYSIZE = struct.calcsize(ENTRYFORMAT)
+
+class MappedSprite:
+    """
+    Reads one sprite of a memory mapped atlas like an open sprite file
+    """
+    def __init__(self, view, start, end):
+        self.view = view
+        self.pos = start
+        self.end = end
+
+    def readinto(self, buf):
+        count = min(len(buf), self.end - self.pos)
+        buf[:count] = self.view[self.pos:self.pos + count]
+        self.pos += count
+        return count
+
+class VirtualPetAtlas:
+    def __init__(self, strFileName = ATLASFILE):
+        """
+        :param str strFileName: atlas file built by tools/build_atlas.py
+        """
+        self.file = open(strFileName, "rb")
+        magic, count = struct.unpack(HEADERFORMAT, self.file.read(HEADERSIZE))
+        if (magic != MAGIC):
+            self.file.close()
+            raise ValueError("Not a sprite atlas: " + strFileName)
+        # Sprite name: (offset, size) in the atlas file
+        self.index = {}
+        for i in range(count):
+            offset, size, nameLength = struct.unpack(ENTRYFORMAT, self.file.read(ENTRYSIZE))
+            self.index[self.file.read(nameLength).decode()] = (offset, size)
+        self.decoder = VPS.RLEDecoder()
+        self.view = None
+        if (mmap is not None):
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.map)
+
+    def __contains__(self, strName):
+        return strName in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    #function that returns a file like object positioned at the start of a sprite
+    #on the badge this is the atlas file itself, so only one can be read at a time
+    def open(self, strName):
+        offset, size = self.index[strName]
+        if (self.view is not None):
+            return MappedSprite(self.view, offset, offset + size)
+        self.file.seek(offset)
+        return self.file
+
+    #function that returns a sprite from the atlas as a VirtualPetSprite
+    def sprite(self, strName):
+        offset, size = self.index[strName]
+        spriteFile = self.open(strName)
+        magic, width, height, x, y = self.decoder.header(spriteFile)
+        if (magic == VPS.MAGIC and self.view is not None):
+            # Zero copy, the sprite's framebuffer reads the mapped file
+            start = offset + VPS.HEADERSIZE
+            return VPS.VirtualPetSprite(self.view[start:start + VPS.bufferSize(width, height)], width, height, x, y)
+        buf = bytearray(VPS.bufferSize(width, height))
+        sprite = VPS.VirtualPetSprite(buf, width, height, x, y)
+        if (magic == VPS.RLEMAGIC):
+            self.decoder.decode(spriteFile, sprite.framebuf, buf, width, 0, 0, width, height)
+        elif (magic == VPS.MAGIC):
+            spriteFile.readinto(buf)
+        else:
+            raise ValueError("Not a packed sprite: " + strName)
+        return sprite
+
+#function that packs sprite files into an atlas file, names are the paths given
+def writeAtlas(strFileName, listSprites):
+    blobs = []
+    for strName in listSprites:
+        with open(strName, "rb") as spriteFile:
+            blobs.append((strName.encode(), spriteFile.read()))
+    offset = HEADERSIZE + sum(ENTRYSIZE + len(name) for name, data in blobs)
+    with open(strFileName, "wb") as atlasFile:
+        atlasFile.write(struct.pack(HEADERFORMAT, MAGIC, len(blobs)))
+        for name, data in blobs:
+            atlasFile.write(struct.pack(ENTRYFORMAT, offset, len(data), len(name)))
+            atlasFile.write(name)
+            offset += len(data)
+        for name, data in blobs:
+            atlasFile.write(data)
@@ -0,0 +1,221 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetAudio.py`
+====================================================
+
+Non blocking sound effect player for virtual pet game.
+
+One AudioOut is kept for the life of the game and every effect's WaveFile
+is opened once at start up, all sharing one sample buffer. play() returns
+straight away: a higher priority effect cuts off the one playing, anything
+else waits in a small priority queue. update() must be called regularly to
+start the next effect when one finishes.
+
+Tones share the same output. The sine table for every frequency in TONES is
+built once at start up and kept as its own RawSample, so starting a tone is
+just a play() and stopping it a stop(). playSequence() queues a list of
+(frequency, seconds) notes which update() steps through by deadline.
+* Author(s): Kevin Neubauer
+"""
+import array
+import math
+import time
+
+AUDIOPATH = "VirtualPet/assets/audio/"
+
+# Effect name: (file, priority), higher priority effects cut off lower ones
+EFFECTS = {
+    "poo": ("poo.wav", 1),
+    "sleep": ("sleep.wav", 2),
+    "feed": ("feedPet.wav", 3),
+    "clean": ("clean.wav", 3),
+    "doctor": ("doctor.wav", 3),
+    "discipline": ("discipline.wav", 3),
+    "faildiscipline": ("faildiscipline.wav", 3),
+    "die": ("die.wav", 4)
+}
+
+BUFFERSIZE = 1024 # Bytes of sample buffer shared by every WaveFile
+QUEUESIZE = 4 # Effects that can wait behind the one playing
+
+TONES = (350, 400, 440, 100) # Minigame buttons and the fail tone, built at start up
+TONESAMPLES = 100 # Samples per sine cycle, fewer for high notes
+TONERATE = 8000 # Highest sample rate used for tones, Hz
+
+class VirtualPetAudio:
+    def __init__(self, output, speakerEnable, waveFile, rawSample, effects = EFFECTS,
+                 queueSize = QUEUESIZE, tones = TONES, clock = time.monotonic):
+        """
+        :param output: AudioOut (or stand-in) used for every effect and tone
+        :param speakerEnable: DigitalInOut switching the speaker amplifier
+        :param waveFile: WaveFile class, called as waveFile(file, buffer)
+        :param rawSample: RawSample class, called as rawSample(table, sample_rate=rate)
+        :param effects: dict of effect name: (file, priority)
+        :param int queueSize: effects that can wait behind the one playing
+        :param tones: frequencies in Hz to build tone samples for up front
+        :param clock: function returning the time in seconds, for note timing
+        """
+        self.output = output
+        self.speakerEnable = speakerEnable
+        self.queueSize = queueSize
+        self.priorities = {}
+        self.voices = {}
+        self._buffer = bytearray(BUFFERSIZE)
+        for name in effects:
+            strFileName, priority = effects[name]
+            self.priorities[name] = priority
+            self.voices[name] = waveFile(open(AUDIOPATH + strFileName, "rb"), self._buffer)
+        self.current = None #Name of the effect playing
+        self.queue = [] #Names of waiting effects, highest priority first
+        self.played = 0 #Effects started
+        self.preempted = 0 #Effects cut off by a higher priority one
+        self.dropped = 0 #Effects not played because the queue was full
+        self.rawSample = rawSample
+        self.clock = clock
+        self.tones = {} #Frequency: RawSample
+        for frequency in tones:
+            self._toneSample(frequency)
+        self.notes = () #Notes of the sequence playing
+        self.noteIndex = 0 #Next note to start
+        self.noteEnd = 0 #Time the note playing ends
+        self.toneOn = False #Whether a tone holds the output
+
+    #function that plays or queues an effect and returns straight away
+    def play(self, name):
+        priority = self.priorities[name]
+        self.stopTone()
+        if (self.current is not None and not self.output.playing):
+            self.current = None #Finished but update() hasn't run yet
+        if (name == self.current or name in self.queue):
+            if (self.current is None):
+                self._start(self.queue.pop(0))
+            return
+        if (self.current is None):
+            # Nothing playing, start whichever of name and the queue's first is higher
+            if (self.queue and self.priorities[self.queue[0]] >= priority):
+                self._enqueue(name, priority)
+                self._start(self.queue.pop(0))
+            else:
+                self._start(name)
+        elif (priority > self.priorities[self.current]):
+            self.preempted += 1
+            self.output.stop()
+            self._start(name)
+        else:
+            self._enqueue(name, priority)
+
+    #function to call regularly, starts the next queued effect when one finishes
+    #and the next note of a sequence when its time comes
+    def update(self):
+        if (self.toneOn):
+            if (self.clock() >= self.noteEnd):
+                self._nextNote()
+            return
+        if (self.current is not None and not self.output.playing):
+            self.current = None
+            if (self.queue):
+                self._start(self.queue.pop(0))
+            else:
+                self.speakerEnable.value = False
+
+    #function that returns whether an effect is playing or waiting
+    def busy(self):
+        return self.toneOn or self.current is not None or len(self.queue) > 0
+
+    #function that stops the effect or tone playing and clears the queue
+    def stop(self):
+        self.stopTone()
+        self.queue = []
+        if (self.current is not None):
+            self.output.stop()
+            self.current = None
+        self.speakerEnable.value = False
+
+    #function that plays a single tone for duration seconds and returns straight away
+    def tone(self, frequency, duration):
+        self.playSequence(((frequency, duration),))
+
+    #function that plays notes, a sequence of (frequency, seconds), and returns
+    #straight away. A frequency of 0 is a rest
+    def playSequence(self, notes):
+        self.stop()
+        self.notes = notes
+        self.noteIndex = 0
+        self.noteEnd = self.clock()
+        self.toneOn = True
+        self.speakerEnable.value = True
+        self._nextNote()
+
+    #function that stops the tone or sequence playing
+    def stopTone(self):
+        if (self.toneOn):
+            self.output.stop()
+            self.notes = ()
+            self.toneOn = False
+            self.speakerEnable.value = False
+
+    def _nextNote(self):
+        self.output.stop()
+        if (self.noteIndex >= len(self.notes)):
+            self.stopTone()
+            return
+        frequency, duration = self.notes[self.noteIndex]
+        self.noteIndex += 1
+        # Time notes from when the last one was due, so update() jitter doesn't add up
+        self.noteEnd = max(self.noteEnd, self.clock() - duration) + duration
+        if (frequency > 0):
+            self.output.play(self._toneSample(frequency), loop=True)
+
+    # Cached looping sample for frequency, built on first use if not in TONES
+    def _toneSample(self, frequency):
+        sample = self.tones.get(frequency)
+        if (sample is None):
+            length = TONESAMPLES
+            if (length * frequency > TONERATE):
+                length = TONERATE // frequency
+            volume = (2 ** 15) - 1
+            shift = 2 ** 15
+            table = array.array("H", [0] * length)
+            for i in range(length):
+                table[i] = int(volume * math.sin(2 * math.pi * (i / length)) + shift)
+            sample = self.rawSample(table, sample_rate=int(length * frequency))
+            self.tones[frequency] = sample
+        return sample
+
+    def _start(self, name):
+        self.current = name
+        self.played += 1
+        self.speakerEnable.value = True
+        self.output.play(self.voices[name])
+
+    def _enqueue(self, name, priority):
+        # Keep the queue ordered by priority, first come first served within one
+        index = len(self.queue)
+        while (index > 0 and self.priorities[self.queue[index - 1]] < priority):
+            index -= 1
+        if (len(self.queue) >= self.queueSize):
+            if (index >= self.queueSize):
+                self.dropped += 1
+                return
+            self.queue.pop()
+            self.dropped += 1
+        self.queue.insert(index, name)
@@ -0,0 +1,127 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetBackend.py`
+====================================================
+
+Hardware backends for virtual pet game.
+
+VirtualPetGame takes everything it talks to from a backend object:
+
+    display        SH1106 driver (framebuf, width, height, show, write_pages)
+    pad            buttons, get_pressed() returns a bit mask
+    audioOut       AudioOut with play(sample, loop=), stop() and playing
+    speakerEnable  output switching the speaker amplifier, .value
+    waveFile       WaveFile class, called as waveFile(file, buffer)
+    rawSample      RawSample class, called as rawSample(table, sample_rate=rate)
+    pixels         NeoPixels, fill() and indexing
+    clock          monotonic(), monotonic_ns(), time(), async sleep(seconds)
+                   and run(coroutine) to run the game's event loop
+    cpuClock       monotonic_ns() of real time, for timing the work the game
+                   does (the profiler), even when clock is virtual
+    saveFile       path of the save file, None to not save
+    seed           seed for the game's random numbers, None for a random one
+
+DeviceBackend builds these from the badge hardware. HostBackend uses the
+pure Python stand-ins in VirtualPet/host so the game runs headless on a PC,
+on a virtual clock, with the real SH1106 driver writing to a recording I2C
+bus. Nothing touches the hardware until a backend is created.
+* Author(s): Kevin Neubauer
+"""
+import time
+import asyncio
+import sh1106
+import VirtualPet.lib.VirtualPetClock as VPC
+import VirtualPet.lib.VirtualPetStorage as VPST
+try:
+    import board
+    import busio
+    import digitalio
+    import audioio
+    import neopixel
+    import gamepad
+except ImportError:
+    board = None # Not on the badge, only HostBackend can be used
+try:
+    import audiocore
+except ImportError:
+    audiocore = None
+
+SCRWIDTH = 128
+SCRHEIGHT = 64
+DISPLAYADDRESS = 0x3c
+PIX_NUM = 10
+PIX_BRIGHTNESS = 0.05
+
+class DeviceClock:
+    def __init__(self):
+        self.monotonic = time.monotonic
+        self.monotonic_ns = VPC.monotonic_ns
+        self.time = time.time
+        self.sleep = asyncio.sleep
+        self.run = asyncio.run
+
+class DeviceBackend:
+    def __init__(self, saveFile = VPST.SAVEFILE, seed = None):
+        self.clock = DeviceClock()
+        self.cpuClock = VPC.monotonic_ns
+
+        #initialize screen over I2C
+        self.i2c = busio.I2C(board.SCL, board.SDA)
+        self.display = sh1106.SH1106_I2C(SCRWIDTH, SCRHEIGHT, self.i2c, addr=DISPLAYADDRESS)
+
+        buttons = [digitalio.DigitalInOut(pin) for pin in (board.LEFT_BUTTON, board.MIDDLE_BUTTON, board.RIGHT_BUTTON)]
+        for button in buttons:
+            button.direction = digitalio.Direction.INPUT
+            button.pull = digitalio.Pull.DOWN
+        self.pad = gamepad.GamePad(buttons[0], buttons[1], buttons[2])
+
+        self.speakerEnable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
+        self.speakerEnable.switch_to_output(value=False)
+        self.audioOut = audioio.AudioOut(board.SPEAKER)
+        samples = audiocore if audiocore is not None else audioio
+        self.waveFile = samples.WaveFile
+        self.rawSample = samples.RawSample
+
+        self.pixels = neopixel.NeoPixel(board.NEOPIXEL, PIX_NUM, brightness=PIX_BRIGHTNESS)
+        self.saveFile = saveFile
+        self.seed = seed
+
+class HostBackend:
+    def __init__(self, saveFile = None, record = False, seed = None):
+        """
+        :param saveFile: path of the save file, None to not save
+        :param bool record: keep every I2C write in i2c.log
+        :param seed: seed for the game's random numbers, None for a random one
+        """
+        import VirtualPet.host.hardware as hardware
+        self.clock = hardware.VirtualClock()
+        self.cpuClock = VPC.monotonic_ns # Real time, the virtual clock stands still while the game works
+        self.i2c = hardware.RecordingI2C(record)
+        self.display = sh1106.SH1106_I2C(SCRWIDTH, SCRHEIGHT, self.i2c, addr=DISPLAYADDRESS)
+        self.pad = hardware.HostPad()
+        self.speakerEnable = hardware.HostPin()
+        self.audioOut = hardware.HostAudioOut(self.clock)
+        self.waveFile = hardware.HostWaveFile
+        self.rawSample = hardware.HostRawSample
+        self.pixels = hardware.HostPixels(PIX_NUM)
+        self.saveFile = saveFile
+        self.seed = seed
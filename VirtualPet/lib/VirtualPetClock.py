@@ -0,0 +1,86 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetClock.py`
+====================================================
+
+Fixed timestep simulation clock for virtual pet game.
+
+Pet life ticks are scheduled from the monotonic clock at a fixed rate, so
+the pet ages at the same speed no matter how long a frame took to render.
+After a long blocking frame the missed ticks are run in batches of at most
+maxBatch per frame until the clock has caught up.
+* Author(s): Kevin Neubauer
+"""
+import time
+
+TICKRATE = 1 # Pet life ticks per second
+MAXBATCH = 50 # Most ticks run in a single frame while catching up
+NS_PER_SEC = 1000000000
+
+try:
+    monotonic_ns = time.monotonic_ns
+except AttributeError:
+    def monotonic_ns():
+        return int(time.monotonic() * NS_PER_SEC)
+
+class VirtualPetClock:
+    def __init__(self, tickRate = TICKRATE, maxBatch = MAXBATCH, clock = monotonic_ns):
+        self.tickInterval = NS_PER_SEC // tickRate
+        self.maxBatch = maxBatch
+        self.clock = clock
+        self.ticks = 0 #Total ticks handed out
+        self.frames = 0 #Total calls to update
+        self.tickRate = 0 #Measured ticks per second over the last second
+        self.frameRate = 0 #Measured frames per second over the last second
+        self._last = clock()
+        self._pending = 0 #Nanoseconds of simulation time not yet ticked
+        self._windowStart = self._last
+        self._windowTicks = 0
+        self._windowFrames = 0
+
+    #function to call once per frame, returns the number of life ticks to run
+    def update(self):
+        now = self.clock()
+        self._pending += now - self._last
+        self._last = now
+
+        due = self._pending // self.tickInterval
+        if (due > self.maxBatch):
+            due = self.maxBatch
+        self._pending -= due * self.tickInterval
+
+        self.ticks += due
+        self.frames += 1
+        self._windowTicks += due
+        self._windowFrames += 1
+        elapsed = now - self._windowStart
+        if (elapsed >= NS_PER_SEC):
+            self.tickRate = self._windowTicks * NS_PER_SEC / elapsed
+            self.frameRate = self._windowFrames * NS_PER_SEC / elapsed
+            self._windowStart = now
+            self._windowTicks = 0
+            self._windowFrames = 0
+        return due
+
+    #function that returns how many ticks are still owed after this frame
+    def backlog(self):
+        return self._pending // self.tickInterval
@@ -0,0 +1,215 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetCompositor.py`
+====================================================
+
+Layered scene compositor for virtual pet game.
+
+The main scene is a stack of layers, drawn bottom to top:
+
+    background, foreground   static, drawn once into a cached screen
+    poo, pet                 sprites that move or come and go
+    menu                     overlay drawn by a function
+
+Each layer holds a tuple of items, either a sprite
+(file name or VirtualPetSprite, x, y, transparent) or an overlay (draw
+function, x, y, width, height) whose function draws over that whole area.
+set() replaces the items of a layer; when they differ from before, the
+areas of the old and new items are damaged. An opaque item replacing one
+it covers, with nothing above it, is just drawn over it instead, e.g.
+moving between pages of the menu. compose() copies the damaged columns of each 8
+pixel page back from the cached static screen, then redraws every item
+touching the damage. The damage is first grown to cover all of each item
+it touches, so items are always drawn whole and in order.
+* Author(s): Kevin Neubauer
+"""
+try:
+    import framebuf
+except ImportError:
+    from VirtualPet.host import framebuf
+import VirtualPet.lib.VirtualPetSprite as VPS
+
+LAYERS = ("background", "foreground", "poo", "pet", "menu")
+STATICLAYERS = ("background", "foreground")
+
+class VirtualPetCompositor:
+    def __init__(self, fb, layers = LAYERS, staticLayers = STATICLAYERS):
+        """
+        :param fb: VirtualPetFramebuf the scene is composed on
+        :param layers: names of the layers, bottom first
+        :param staticLayers: names of the layers cached as the static screen
+        """
+        self.fb = fb
+        self.layers = layers
+        self.staticLayers = staticLayers
+        self.dynamicLayers = tuple(name for name in layers if name not in staticLayers)
+        self.items = dict((name, ()) for name in layers)
+        # Static layers rendered once, the scene is restored from this
+        self.base = bytearray(VPS.bufferSize(fb.width, fb.height))
+        self.baseView = memoryview(self.base)
+        self.baseFramebuf = framebuf.FrameBuffer(self.base, fb.width, fb.height, framebuf.MONO_VLSB)
+        self.baseValid = False
+        # Column range [start, end) of each page to restore and redraw
+        self.pages = (fb.height + 7) // 8
+        self._damageStart = bytearray(self.pages)
+        self._damageEnd = bytearray(self.pages)
+        # Items drawn straight over the ones they replaced, (layer, index)
+        self._direct = []
+
+    #function that replaces the items of a layer, damaging their areas if they changed
+    def set(self, strLayer, items):
+        old = self.items[strLayer]
+        if (items == old):
+            return
+        self.items[strLayer] = items
+        if (strLayer in self.staticLayers):
+            self.baseValid = False
+            self.invalidate()
+            return
+        if (len(old) == 1 and len(items) == 1 and self._covers(items[0], old[0])
+                and not self._coveredAbove(strLayer, self._area(items[0]))):
+            self._direct.append((strLayer, 0))
+            return
+        for item in old:
+            self._damage(*self._area(item))
+        for item in items:
+            self._damage(*self._area(item))
+
+    #function that marks the whole scene to be redrawn, e.g. after another screen was shown
+    def invalidate(self):
+        self._damage(0, 0, self.fb.width, self.fb.height)
+
+    #function that redraws the damaged parts of the scene on the framebuffer
+    def compose(self):
+        if (not self.baseValid):
+            self._renderBase()
+
+        # Grow the damage over every item touching it, until no more are found
+        drawn = set()
+        found = True
+        while (found):
+            found = False
+            for strLayer in self.dynamicLayers:
+                items = self.items[strLayer]
+                for i in range(len(items)):
+                    if ((strLayer, i) in drawn):
+                        continue
+                    area = self._area(items[i])
+                    if (self._touches(*area)):
+                        self._damage(*area)
+                        drawn.add((strLayer, i))
+                        found = True
+
+        # Restore the damaged columns of each page from the static layers
+        fb = self.fb
+        width = fb.width
+        for page in range(self.pages):
+            start = self._damageStart[page]
+            end = self._damageEnd[page]
+            if (end == 0):
+                continue
+            destination = page * fb.stride
+            source = page * width
+            fb.buffer[destination + start:destination + end] = self.baseView[source + start:source + end]
+            fb.markDirty(start, page * 8, end - start, 8)
+            self._damageStart[page] = 0
+            self._damageEnd[page] = 0
+
+        for strLayer in self.dynamicLayers:
+            items = self.items[strLayer]
+            for i in range(len(items)):
+                if ((strLayer, i) in drawn or (strLayer, i) in self._direct):
+                    self._draw(items[i])
+        self._direct = []
+
+    def _renderBase(self):
+        self.baseFramebuf.fill(0)
+        for strLayer in self.staticLayers:
+            for item in self.items[strLayer]:
+                sprite = self.fb.sprites.get(item[0])
+                self.baseFramebuf.blit(sprite.framebuf, item[1], item[2], 0 if item[3] else -1)
+        self.baseValid = True
+
+    # Returns (x, y, width, height) covered by an item
+    def _area(self, item):
+        if (isinstance(item[0], str)):
+            sprite = self.fb.sprites.get(VPS.splitFlipped(item[0])[0])
+            return (item[1], item[2], sprite.width, sprite.height)
+        if (isinstance(item[0], VPS.VirtualPetSprite)):
+            return (item[1], item[2], item[0].width, item[0].height)
+        return item[1:5]
+
+    def _draw(self, item):
+        if (isinstance(item[0], str)):
+            self.fb.drawSprite(item[0], item[1], item[2], item[3])
+        elif (isinstance(item[0], VPS.VirtualPetSprite)):
+            self.fb.blitSprite(item[0], item[1], item[2], item[3])
+        else:
+            item[0]()
+
+    # Returns whether item draws every pixel of the area of old
+    def _covers(self, item, old):
+        if (not callable(item[0]) and item[3]):
+            return False # Transparent sprite
+        x, y, width, height = self._area(item)
+        oldX, oldY, oldWidth, oldHeight = self._area(old)
+        return (x <= oldX and y <= oldY and x + width >= oldX + oldWidth and y + height >= oldY + oldHeight)
+
+    # Returns whether any item in a layer above strLayer overlaps an area
+    def _coveredAbove(self, strLayer, area):
+        x, y, width, height = area
+        for above in self.layers[self.layers.index(strLayer) + 1:]:
+            for item in self.items[above]:
+                itemX, itemY, itemWidth, itemHeight = self._area(item)
+                if (itemX < x + width and x < itemX + itemWidth and itemY < y + height and y < itemY + itemHeight):
+                    return True
+        return False
+
+    def _damage(self, x, y, width, height):
+        x0 = max(x, 0)
+        x1 = min(x + width, self.fb.width)
+        y0 = max(y, 0)
+        y1 = min(y + height, self.fb.height)
+        if (x0 >= x1 or y0 >= y1):
+            return
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            if (self._damageEnd[page] == 0):
+                self._damageStart[page] = x0
+                self._damageEnd[page] = x1
+            else:
+                if (x0 < self._damageStart[page]):
+                    self._damageStart[page] = x0
+                if (x1 > self._damageEnd[page]):
+                    self._damageEnd[page] = x1
+
+    # Returns whether an area overlaps the damage of any of its pages
+    def _touches(self, x, y, width, height):
+        x0 = max(x, 0)
+        x1 = min(x + width, self.fb.width)
+        y0 = max(y, 0)
+        y1 = min(y + height, self.fb.height)
+        if (x0 >= x1 or y0 >= y1):
+            return False
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            if (self._damageEnd[page] and x0 < self._damageEnd[page] and x1 > self._damageStart[page]):
+                return True
+        return False
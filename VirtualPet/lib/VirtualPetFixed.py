@@ -0,0 +1,225 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetFixed.py`
+====================================================
+
+Fixed point version of the VirtualPet class for microcontrollers.
+
+Stats are held as integers in units of 1/SCALE, which stay small ints on
+CircuitPython, so a life tick allocates nothing on the heap and keeps no
+rounding drift. The per tick deltas for the current awake/asleep mode are
+worked out once when awake changes instead of being looked up every tick.
+
+The attribute API matches VirtualPet: stats read and assign as floats, and
+the rate constants are taken from VirtualPet.
+* Author(s): Kevin Neubauer
+"""
+import VirtualPet.lib.VirtualPet as VP
+
+SCALE = 100000 # Fixed point units per stat point, exact for all the rates
+POOPUNIT = 10 * SCALE # poopLevel per poop
+
+def _toFixed(value):
+    return int(round(value * SCALE))
+
+def _ceilDiv(a, b):
+    return -(-a // b)
+
+class VirtualPetFixed:
+    __slots__ = ("_hunger", "_happiness", "_health", "_discipline", "_poopLevel",
+                 "_weight", "_age", "_awake", "dead",
+                 "_dHunger", "_dHappiness", "_dDiscipline", "_dPoop",
+                 "_dAge", "_dHealth", "_dPoopHealth")
+
+    agingRate = VP.VirtualPet.agingRate
+    healthRate = VP.VirtualPet.healthRate
+    poopHealthMultiplier = VP.VirtualPet.poopHealthMultiplier
+    sleepRate = VP.VirtualPet.sleepRate
+    awakeRate = VP.VirtualPet.awakeRate
+
+    def __init__(self):
+        self._dAge = _toFixed(self.agingRate)
+        self._dHealth = _toFixed(self.healthRate)
+        self._dPoopHealth = _toFixed(self.poopHealthMultiplier)
+        self.hunger = 100
+        self.happiness = 100
+        self.health = 100
+        self.discipline = 100
+        self.poopLevel = 0
+        self.weight = 1
+        self.age = 0
+        self.awake = True
+        self.dead = False
+
+    @property
+    def hunger(self):
+        return self._hunger / SCALE
+
+    @hunger.setter
+    def hunger(self, value):
+        self._hunger = _toFixed(value)
+
+    @property
+    def happiness(self):
+        return self._happiness / SCALE
+
+    @happiness.setter
+    def happiness(self, value):
+        self._happiness = _toFixed(value)
+
+    @property
+    def health(self):
+        return self._health / SCALE
+
+    @health.setter
+    def health(self, value):
+        self._health = _toFixed(value)
+
+    @property
+    def discipline(self):
+        return self._discipline / SCALE
+
+    @discipline.setter
+    def discipline(self, value):
+        self._discipline = _toFixed(value)
+
+    @property
+    def poopLevel(self):
+        return self._poopLevel / SCALE
+
+    @poopLevel.setter
+    def poopLevel(self, value):
+        self._poopLevel = _toFixed(value)
+
+    @property
+    def weight(self):
+        return self._weight / SCALE
+
+    @weight.setter
+    def weight(self, value):
+        self._weight = _toFixed(value)
+
+    @property
+    def age(self):
+        return self._age / SCALE
+
+    @age.setter
+    def age(self, value):
+        self._age = _toFixed(value)
+
+    @property
+    def awake(self):
+        return self._awake
+
+    @awake.setter
+    def awake(self, value):
+        # Switch the per tick deltas to the new mode's rates
+        self._awake = value
+        if (value):
+            rates = self.awakeRate
+        else:
+            rates = self.sleepRate
+        self._dHunger = _toFixed(rates["hunger"])
+        self._dHappiness = _toFixed(rates["happiness"])
+        self._dDiscipline = _toFixed(rates["discipline"])
+        self._dPoop = _toFixed(rates["poop"])
+
+    def decrementHunger(self):
+        self._hunger -= self._dHunger
+
+    def decrementHappiness(self):
+        self._happiness -= self._dHappiness
+
+    def decrementDiscipline(self):
+        self._discipline -= self._dDiscipline
+
+    def incrementPoopLevel(self):
+        self._poopLevel += self._dPoop
+
+    def incrementAge(self):
+        self._age += self._dAge
+
+    def decrementHealth(self):
+        self._health -= self._dHealth + (self.countPoops() * self._dPoopHealth)
+
+    def countPoops(self):
+        return self._poopLevel // POOPUNIT
+
+    def checkOverallHealth(self):
+        if (self._hunger <= 0 or self._health <= 0 or self._happiness <= 0):
+            self.dead = True
+
+    def lifeTick(self):
+        # Same steps as VirtualPet.lifeTick, inlined
+        self._hunger -= self._dHunger
+        self._happiness -= self._dHappiness
+        self._discipline -= self._dDiscipline
+        self._poopLevel += self._dPoop
+        self._age += self._dAge
+        self._health -= self._dHealth + ((self._poopLevel // POOPUNIT) * self._dPoopHealth)
+        if (self._hunger <= 0 or self._health <= 0 or self._happiness <= 0):
+            self.dead = True
+
+    def advance(self, ticks):
+        """
+        Fast forward the pet by up to ticks life ticks, see VirtualPet.advance.
+        In fixed point the result is exactly that of calling lifeTick() ticks
+        times, stopping on the tick the pet dies.
+
+        :param int ticks: The number of life ticks to apply
+        :return: The number of ticks applied, less than ticks only if the pet died
+        """
+        done = 0
+        while (done < ticks and not self.dead):
+            steps = ticks - done
+
+            # Poop count is constant until poopLevel reaches the next multiple of POOPUNIT
+            poops = (self._poopLevel + self._dPoop) // POOPUNIT
+            if (self._dPoop > 0):
+                boundary = _ceilDiv(POOPUNIT * (poops + 1) - self._poopLevel, self._dPoop)
+                steps = min(steps, max(1, boundary - 1))
+            healthDrop = self._dHealth + (poops * self._dPoopHealth)
+
+            # Stop on the tick the first stat reaches zero
+            steps = min(steps,
+                        self._ticksUntilEmpty(self._hunger, self._dHunger, steps),
+                        self._ticksUntilEmpty(self._happiness, self._dHappiness, steps),
+                        self._ticksUntilEmpty(self._health, healthDrop, steps))
+
+            self._hunger -= steps * self._dHunger
+            self._happiness -= steps * self._dHappiness
+            self._discipline -= steps * self._dDiscipline
+            self._poopLevel += steps * self._dPoop
+            self._age += steps * self._dAge
+            self._health -= steps * healthDrop
+            done += steps
+            self.checkOverallHealth()
+
+        return done
+
+    # Number of ticks until value falls to zero at rate per tick, capped at limit
+    def _ticksUntilEmpty(self, value, rate, limit):
+        if (rate <= 0):
+            return limit
+        if (value <= 0):
+            return 1
+        return min(limit, max(1, _ceilDiv(value, rate)))
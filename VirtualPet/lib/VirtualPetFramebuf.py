@@ -23,33 +23,98 @@
 ====================================================
 
 CircuitPython virtual pet framebuffer / wrapper class for virtual pet game
+
+Drawing only changes the framebuffer and marks the area dirty; nothing is
+sent to the display until screenPrint(). A frame groups drawing into one
+update: screenPrint() calls inside it are put off until it ends.
+
+    with fb:
+        fb.fill_rect(0, 0, 127, 29, BLACK)
+        fb.text("Feed/Water", 8, 2, WHITE)
+
+is the same as beginFrame(), the drawing, then endFrame().
 * Author(s): Kevin Neubauer
 """
-import board
-import busio
-import sh1106
 import time
-import framebuf
+try:
+    import framebuf
+except ImportError:
+    # Headless on a PC, see VirtualPet/host
+    from VirtualPet.host import framebuf
+import VirtualPet.lib.VirtualPetSprite as VPS
 
 WHITE = 1;
 BLACK = 0;
 SCRWIDTH = 128;
 SCRHEIGHT = 64;
-
-#initialize screen over I2C
-i2c = busio.I2C(board.SCL, board.SDA)
-display = sh1106.SH1106_I2C(SCRWIDTH, SCRHEIGHT, i2c, addr=0x3c)
+SPRITECACHEBYTES = 8192;
 
 class VirtualPetFramebuf:
 
-    def __init__(self, intWidth, intHeight):
+    def __init__(self, intWidth, intHeight, display, intCacheBytes = SPRITECACHEBYTES, atlas = None):
         self.height = intHeight;
         self.width = intWidth;
-        bufsize = self.width * self.height // 8
-        buf = bytearray(bufsize)
-        for x in range(bufsize):
-            buf[x] = 0
-        self.framebuf = framebuf.FrameBuffer(buf, self.width, self.height, framebuf.MONO_VLSB)
+        self.display = display # SH1106 driver from the game's backend
+        if (self.width == display.width and self.height == display.height):
+            # Draw straight into the display driver's buffer so screenPrint
+            # only has to send it, no copy needed
+            self.shared = True
+            self.framebuf = display.framebuf
+            if (hasattr(display, "stride")):
+                # I2C driver, each page starts with its data control byte
+                self.buffer = memoryview(display.buffer)[1:]
+                self.stride = display.stride
+            else:
+                self.buffer = memoryview(display.buffer)
+                self.stride = self.width
+        else:
+            self.shared = False
+            bufsize = VPS.bufferSize(self.width, self.height) # Whole pages, height rounded up to 8
+            buf = bytearray(bufsize)
+            self.framebuf = framebuf.FrameBuffer(buf, self.width, self.height, framebuf.MONO_VLSB)
+            self.buffer = memoryview(buf)
+            self.stride = self.width
+        # Decoded sprites shared by every draw, see drawSprite
+        self.sprites = VPS.VirtualPetSpriteCache(intCacheBytes, atlas)
+        # Sprites are read from here rather than their own files when in it, see VirtualPetAtlas
+        self.atlas = atlas
+        # Streams .rle sprites straight into the buffer, see drawStream
+        self.decoder = VPS.RLEDecoder()
+        # Column range [start, end) touched on each 8 pixel page since the last screenPrint
+        self.pages = (self.height + 7) // 8
+        self._dirtyStart = bytearray(self.pages)
+        self._dirtyEnd = bytearray(self.pages)
+        self.markDirty()
+        self.frameDepth = 0 # Frames begun and not yet ended, see beginFrame
+
+    #function to record the area touched by a drawing operation, whole screen by default
+    def markDirty(self, x = 0, y = 0, width = None, height = None):
+        if (width is None):
+            width = self.width
+        if (height is None):
+            height = self.height
+        x0 = max(x, 0)
+        x1 = min(x + width, self.width)
+        y0 = max(y, 0)
+        y1 = min(y + height, self.height)
+        if (x0 >= x1 or y0 >= y1):
+            return
+        for page in range(y0 >> 3, ((y1 - 1) >> 3) + 1):
+            if (self._dirtyEnd[page] == 0):
+                self._dirtyStart[page] = x0
+                self._dirtyEnd[page] = x1
+            else:
+                if (x0 < self._dirtyStart[page]):
+                    self._dirtyStart[page] = x0
+                if (x1 > self._dirtyEnd[page]):
+                    self._dirtyEnd[page] = x1
+
+    #function that returns whether anything was drawn since the last screenPrint
+    def isDirty(self):
+        for page in range(self.pages):
+            if (self._dirtyEnd[page]):
+                return True
+        return False
 
     #function that takes 0 and 1 contents from a string and populates a framebuffer object
     def setContentsFromString(self, strBits, x_origin = 0, y_origin = 0):
@@ -62,6 +127,7 @@ class VirtualPetFramebuf:
             if (x == self.width):
                 y = y + 1;
                 x = 0;
+        self.markDirty(x_origin, y_origin, self.width, y + 1)
 
     #function that takes 0 and 1 contents from a list and populates a framebuffer object
     def setContentsFromList(self, listObj, x_origin = 0, y_origin = 0):
@@ -70,6 +136,8 @@ class VirtualPetFramebuf:
             for x, col in enumerate(row):
                 #print("x: " + str(x) + " y: " + str(y) + " - " + str(col))
                 self.framebuf.pixel((x + x_origin), (y + y_origin), int(col))
+        if (pic):
+            self.markDirty(x_origin, y_origin, max(len(row) for row in pic), len(pic))
 
     #function that takes 0 and 1 contents from a file and populates a framebuffer object
     def setContentsFromFile(self, strFileName, x_origin = 0, y_origin = 0):
@@ -77,6 +145,108 @@ class VirtualPetFramebuf:
         for y, row in enumerate(pic):
             for x, col in enumerate(row):
                 self.framebuf.pixel((x + x_origin), (y + y_origin), int(col))
+        if (pic):
+            self.markDirty(x_origin, y_origin, max(len(row) for row in pic), len(pic))
+
+    #function that reads a packed .bin sprite straight into a framebuffer and blits it
+    #origin defaults to the one stored in the sprite header
+    def setContentsFromBinary(self, strFileName, x_origin = None, y_origin = None):
+        sprite = self.sprites.load(strFileName)
+        if (x_origin is None):
+            x_origin = sprite.x
+        if (y_origin is None):
+            y_origin = sprite.y
+        self.framebuf.blit(sprite.framebuf, x_origin, y_origin)
+        self.markDirty(x_origin, y_origin, sprite.width, sprite.height)
+
+    #function that draws a packed .bin sprite through the sprite cache
+    #origin defaults to the one stored in the sprite header
+    #with transparent set only the sprite's set pixels are drawn, leaving what is under the rest
+    #a mask sprite's set pixels are cleared first, so the sprite's own 0 pixels inside it are drawn
+    #a name ending in VPS.FLIPPED is drawn mirrored from the cached unflipped sprite
+    def drawSprite(self, strFileName, x_origin = None, y_origin = None, transparent = False, mask = None):
+        strFileName, mirrored = VPS.splitFlipped(strFileName)
+        sprite = self.sprites.get(strFileName)
+        if (x_origin is None):
+            x_origin = sprite.x
+        if (y_origin is None):
+            y_origin = sprite.y
+        if (mask is not None):
+            # Inverted, the mask's set pixels are the 0 pixels drawn by key 1
+            maskSprite = self.sprites.get(mask + VPS.INVERTED)
+            if (mirrored):
+                self.blitMirrored(maskSprite, x_origin, y_origin, 1)
+            else:
+                self.framebuf.blit(maskSprite.framebuf, x_origin, y_origin, 1)
+            transparent = True
+        if (mirrored):
+            self.blitMirrored(sprite, x_origin, y_origin, 0 if transparent else -1)
+        else:
+            self.blitSprite(sprite, x_origin, y_origin, transparent)
+
+    #function that draws a VirtualPetSprite, only its set pixels if transparent
+    def blitSprite(self, sprite, x, y, transparent = False):
+        self.framebuf.blit(sprite.framebuf, x, y, 0 if transparent else -1)
+        self.markDirty(x, y, sprite.width, sprite.height)
+
+    #function that draws a VirtualPetSprite mirrored left to right, writing the buffer directly
+    #key is as for framebuf blit: -1 draws every pixel, 0 only set pixels, 1 only 0 pixels
+    def blitMirrored(self, sprite, x, y, key = -1):
+        width = sprite.width
+        height = sprite.height
+        x0 = max(x, 0)
+        x1 = min(x + width, self.width)
+        if (x0 >= x1 or y >= self.height or y + height <= 0):
+            return
+        src = sprite.buffer
+        buf = self.buffer
+        stride = self.stride
+        shift = y & 7
+        spritePages = (height + 7) >> 3
+        lastMask = (0xFF >> (spritePages * 8 - height))
+        for spritePage in range(spritePages):
+            rowMask = lastMask if (spritePage == spritePages - 1) else 0xFF
+            srcEnd = spritePage * width + x + width - 1 # Mirrored, source column of x0 is read from here back
+            # A sprite page lands on up to two screen pages unless page aligned
+            for page, mask in (((y >> 3) + spritePage, (rowMask << shift) & 0xFF),
+                               ((y >> 3) + spritePage + 1, rowMask >> (8 - shift) if shift else 0)):
+                if (mask == 0 or page < 0 or page >= self.pages):
+                    continue
+                row = page * stride
+                lower = page > (y >> 3) + spritePage
+                for dx in range(x0, x1):
+                    byte = src[srcEnd - dx]
+                    byte = (byte >> (8 - shift)) if lower else (byte << shift)
+                    if (key == -1):
+                        buf[row + dx] = (buf[row + dx] & ~mask & 0xFF) | (byte & mask)
+                    elif (key == 0):
+                        buf[row + dx] |= byte & mask
+                    else:
+                        buf[row + dx] &= ~(mask & ~byte) & 0xFF
+        self.markDirty(x, y, width, height)
+
+    #function that streams a run length encoded .rle sprite straight into the framebuffer
+    #used for full screen animation frames, which are drawn once and not worth caching
+    #sprites that aren't page aligned or don't fit on screen go through drawSprite
+    def drawStream(self, strFileName, x_origin = None, y_origin = None):
+        inAtlas = self.atlas is not None and strFileName in self.atlas
+        spriteFile = self.atlas.open(strFileName) if inAtlas else open(strFileName, "rb")
+        try:
+            magic, width, height, x, y = self.decoder.header(spriteFile)
+            if (x_origin is None):
+                x_origin = x
+            if (y_origin is None):
+                y_origin = y
+            if (magic == VPS.RLEMAGIC and x_origin >= 0 and y_origin >= 0 and (y_origin & 7) == 0
+                    and x_origin + width <= self.width and y_origin + height <= self.height):
+                self.decoder.decode(spriteFile, self.framebuf, self.buffer, self.stride,
+                                    x_origin, y_origin, width, height)
+                self.markDirty(x_origin, y_origin, width, height)
+                return
+        finally:
+            if (not inAtlas):
+                spriteFile.close()
+        self.drawSprite(strFileName, x_origin, y_origin)
 
     #function to print framebuffer contents to console
     def consolePrint(self):
@@ -85,33 +255,66 @@ class VirtualPetFramebuf:
                 print(self.framebuf.pixel(x, y), end='')
             print('')
 
+    #function to start a frame, screen updates wait until the frame ends
+    #frames can be nested, the outermost one updates the screen when it ends
+    def beginFrame(self):
+        self.frameDepth += 1
+
+    #function to end a frame, updates the screen once if it was the outermost
+    def endFrame(self):
+        self.frameDepth -= 1
+        if (self.frameDepth == 0):
+            self.screenPrint()
+
+    def __enter__(self):
+        self.beginFrame()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.endFrame()
+
     #function to print framebuffer contents on screen
+    #only the pages and columns drawn to since the last call are sent
+    #inside a frame this waits for the frame to end
     def screenPrint(self):
-        for x in range(0, self.width):
-            for y in range(0, self.height):
-                display.pixel(x, y, self.framebuf.pixel(x, y));
-        display.show();
+        if (self.frameDepth):
+            return
+        if (not self.shared and self.isDirty()):
+            self.display.blit(self.framebuf, 0, 0)
+        for page in range(self.pages):
+            start = self._dirtyStart[page]
+            end = self._dirtyEnd[page]
+            if (end == 0):
+                continue
+            self.display.write_pages((page,), start, end)
+            self._dirtyStart[page] = 0
+            self._dirtyEnd[page] = 0
 
     #function to transpose a framebuffer on top of another framebuffer
-    def blit(self, objFramebuf, origin_x, origin_y):
+    #whole screen is marked dirty unless the size of objFramebuf is given
+    def blit(self, objFramebuf, origin_x, origin_y, width = None, height = None):
         self.framebuf.blit(objFramebuf, origin_x, origin_y)
+        if (width is None or height is None):
+            self.markDirty()
+        else:
+            self.markDirty(origin_x, origin_y, width, height)
 
     #function to render a filled rectangle
     def fill_rect(self, x, y, width, height, color):
         self.framebuf.fill_rect(x, y, width, height, color)
-        display.show()
+        self.markDirty(x, y, width, height)
 
     #function to render a hollow rectangle
     def rect(self, x, y, width, height, color):
         self.framebuf.rect(x, y, width, height, color)
-        display.show()
+        self.markDirty(x, y, width, height)
 
     #function to render text
     def text(self, strText, x, y, color):
         self.framebuf.text(strText, x, y, color)
-        display.show()
+        self.markDirty(x, y, len(strText) * 8, 8)
 
     #function to clear display
     def clearDisplay(self):
         self.framebuf.fill(BLACK);
-        display.show();
\ No newline at end of file
+        self.markDirty()
\ No newline at end of file
@@ -33,29 +33,48 @@ After painted, encode them in 0/1 format using: https://www.dcode.fr/binary-imag
 """
 import VirtualPet.lib.VirtualPetFramebuf as VPB
 import VirtualPet.lib.VirtualPet as VP
-import time
-import board
-import digitalio
-import audioio
-import neopixel
+import VirtualPet.lib.VirtualPetFixed as VPF
+import VirtualPet.lib.VirtualPetClock as VPC
+import VirtualPet.lib.VirtualPetStorage as VPST
+import VirtualPet.lib.VirtualPetAudio as VPA
+import VirtualPet.lib.VirtualPetInput as VPI
+import VirtualPet.lib.VirtualPetBackend as VPBE
+import VirtualPet.lib.VirtualPetProfiler as VPPR
+import VirtualPet.lib.VirtualPetTimeline as VPTL
+import VirtualPet.lib.VirtualPetAtlas as VPAT
+import VirtualPet.lib.VirtualPetCompositor as VPCO
+import VirtualPet.lib.VirtualPetMenu as VPM
+import asyncio
 import random
-import array
-import math
-import gamepad
 try:
-    import audiocore
+    from micropython import const
 except ImportError:
-    audiocore = audioio
+    def const(value):
+        return value
 
 SCRWIDTH = 128;
 SCRHEIGHT = 64;
 WHITE = 1;
 BLACK = 0;
 
+# Pet implementation, VP.VirtualPet for the float model
+PETMODEL = VPF.VirtualPetFixed
+
+FRAMEINTERVAL = 0.2 # Seconds between idle animation frames
+INPUTINTERVAL = 0.02 # Seconds between button scans
+AUDIOINTERVAL = 0.02 # Seconds between checks for the end of a sound
+LEDINTERVAL = 0.25 # Seconds between NeoPixel updates
+STATSINTERVAL = 0.5 # Seconds between redraws of the stats pages
+SPLASHTIME = 4 # Seconds the splash screen is shown for
+PROFILEINTERVAL = 0.5 # Seconds between checks for a profile report request
+
+# 1 to time each phase of the game loop, see VirtualPetProfiler
+# With 0 the profiling code is left out when compiled
+PROFILE = const(0)
+
 HEALTHWARNING = 25
 HEALTHDANGER = 10
 
-PIX_NUM = 10
 PIX_RED = (255, 0, 0)
 PIX_YELLOW = (255, 150, 0)
 PIX_GREEN = (0, 255, 0)
@@ -64,8 +83,6 @@ PIX_BLUE = (0, 0, 255)
 PIX_PURPLE = (180, 0, 255)
 PIX_OFF = (0, 0, 0)
 
-pixels = neopixel.NeoPixel(board.NEOPIXEL, PIX_NUM, brightness=0.05)
-
 GAMEMENU = {}
 GAMEMENU[1] = ["Feed/Water", "Snack", "Meal", "Water"]
 GAMEMENU[2] = ["Play Game"]
@@ -77,95 +94,110 @@ GAMEMENU[7] = ["Display Stats"]
 GAMEMENU[8] = ["Sound"]
 GAMEMENU[9] = ["Lights"]
 
-button_pins = (board.LEFT_BUTTON, board.MIDDLE_BUTTON, board.RIGHT_BUTTON)
+# Sprites loaded into the cache at start up
+PRELOADSPRITES = (
+    "VirtualPet/assets/petWalkLeft1.bin", # Also drawn mirrored when facing right
+    "VirtualPet/assets/petWalkLeft2.bin",
+    "VirtualPet/assets/sleeping.bin",
+    "VirtualPet/assets/foreground.bin",
+    "VirtualPet/assets/background.bin",
+    "VirtualPet/assets/petEating1.bin",
+    "VirtualPet/assets/petEating2.bin",
+    "VirtualPet/assets/buttonDown.bin",
+    "VirtualPet/assets/buttonUp.bin",
+    "VirtualPet/assets/poo.bin"
+)
+
+# Animations played by VirtualPetTimeline: (asset, position, frames, sound) steps
+def feedingAnimation(strFood):
+    steps = []
+    for frame in (1, 2, 3):
+        steps.append(("VirtualPet/assets/%s%d.rle" % (strFood, frame), (0, 0), 1, None))
+        steps.append(("VirtualPet/assets/petEating1.bin", (64, 0), 1, None))
+        steps.append(("VirtualPet/assets/petEating2.bin", (64, 0), 1, "feed" if frame == 1 else None))
+    return tuple(steps)
+
+ANIMATIONS = {
+    "Snack": feedingAnimation("snack"),
+    "Meal": feedingAnimation("meal"),
+    "Water": feedingAnimation("water"),
+    "clean": (
+        ("VirtualPet/assets/clean1.rle", (0, 0), 1, "clean"),
+        ("VirtualPet/assets/clean2.rle", (0, 0), 1, None),
+        ("VirtualPet/assets/clean3.rle", (0, 0), 1, None)
+    ),
+    "doctor": (
+        ("VirtualPet/assets/doctor1.rle", (0, 0), 1, None),
+        ("VirtualPet/assets/doctor2.rle", (0, 0), 1, "doctor"),
+        ("VirtualPet/assets/doctor3.rle", (0, 0), 2, None)
+    ),
+    "discipline": (
+        ("VirtualPet/assets/discipline1.rle", (0, 0), 1, None),
+        ("VirtualPet/assets/discipline2.rle", (0, 0), 1, None),
+        ("VirtualPet/assets/discipline1.rle", (0, 0), 1, None),
+        ("VirtualPet/assets/discipline2.rle", (0, 0), 1, "discipline")
+    )
+}
+
 B_LEFT = 1 << 0;
 B_MID = 1 << 1;
 B_RIGHT = 1 << 2;
-buttons = [digitalio.DigitalInOut(pin) for pin in button_pins]
-for button in buttons:
-    button.direction = digitalio.Direction.INPUT
-    button.pull = digitalio.Pull.DOWN
-pad = gamepad.GamePad(buttons[0], buttons[1], buttons[2])
 
 class VirtualPetGame:
-    def __init__(self):
+    def __init__(self, backend = None):
+        """
+        :param backend: hardware to run on, see VirtualPetBackend.
+            The badge's hardware (DeviceBackend) if None
+        """
+        if (backend is None):
+            backend = VPBE.DeviceBackend()
+        self.backend = backend
+        self.timebase = backend.clock # Time and sleeps, all game timing goes through this
+        self.pixels = backend.pixels
+
+        # Seed the minigame's random numbers so a session can be replayed, see VirtualPetTrace
+        self.seed = backend.seed
+        if (self.seed is None):
+            self.seed = random.getrandbits(30)
+        random.seed(self.seed)
+
+        # All sprites in one file, without it each is read from its own file
+        try:
+            self.atlas = VPAT.VirtualPetAtlas(VPAT.ATLASFILE)
+        except OSError:
+            self.atlas = None
+
         # Main frame buffer
-        self.fb = VPB.VirtualPetFramebuf(SCRWIDTH, SCRHEIGHT)
-        self.splash()
-        self.fb.clearDisplay();
+        self.fb = VPB.VirtualPetFramebuf(SCRWIDTH, SCRHEIGHT, backend.display, atlas=self.atlas)
 
-        self.speaker_enable = digitalio.DigitalInOut(board.SPEAKER_ENABLE)
-        self.speaker_enable.switch_to_output(value=False)
+        # One audio output for the whole game, effects are opened once here
+        self.audio = VPA.VirtualPetAudio(backend.audioOut, backend.speakerEnable,
+                                         backend.waveFile, backend.rawSample,
+                                         clock=self.timebase.monotonic)
 
-        # Initialize frequently used animation screens
-        # Avoids reading them from file every time
-        with open ("VirtualPet/assets/petWalkLeft1.txt", "r") as myfile:
-            try:
-                self.animateLeft1=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/petWalkLeft2.txt", "r") as myfile:
-            try:
-                self.animateLeft2=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/petWalkRight1.txt", "r") as myfile:
-            try:
-                self.animateRight1=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/petWalkRight2.txt", "r") as myfile:
-            try:
-                self.animateRight2=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/sleeping.txt", "r") as myfile:
-            try:
-                self.AnimateSleeping=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/foreground.txt", "r") as myfile:
-            try:
-                self.foreground=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/background.txt", "r") as myfile:
-            try:
-                self.background=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/petEating1.txt", "r") as myfile:
-            try:
-                self.eating1=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/petEating2.txt", "r") as myfile:
-            try:
-                self.eating2=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/buttonDown.txt", "r") as myfile:
-            try:
-                self.buttonDown=myfile.readlines()
-            finally:
-                myfile.close()
-
-        with open ("VirtualPet/assets/buttonUp.txt", "r") as myfile:
-            try:
-                self.buttonUp=myfile.readlines()
-            finally:
-                myfile.close()
+        # Button events, scanned in the background by inputTask
+        self.input = VPI.VirtualPetInput(backend.pad, clock=self.timebase.monotonic_ns)
 
-        self.renderMainLandscape()
+        # Main scene as layers, the landscape is drawn once and kept
+        self.scene = VPCO.VirtualPetCompositor(self.fb)
+        self.scene.set("background", (("VirtualPet/assets/background.bin", 0, 0, False),))
+        self.scene.set("foreground", (("VirtualPet/assets/foreground.bin", 0, 50, False),))
+
+        # Menu pages, rendered once and kept
+        # Items showing a setting: (labels indexed by the setting, setting)
+        self.menu = VPM.VirtualPetMenu(GAMEMENU, {
+            "Sleep": (("Disable", "Enable"), lambda: self.pet.awake),
+            "Sound": (("Enable", "Disable"), lambda: self.soundEnabled),
+            "Lights": (("Enable", "Disable"), lambda: self.lightsEnabled)
+        })
+
+        # Plays the feeding and care animations
+        self.timeline = VPTL.VirtualPetTimeline(self.fb, self.audio, self.timebase)
+
+        # Warm the sprite cache with frequently used animation screens
+        # Avoids reading them from file every time
+        for strFileName in PRELOADSPRITES:
+            self.fb.sprites.get(strFileName)
 
         self.soundEnabled = True #Flag for enabling/disabling sound
         self.lightsEnabled = True #Flag for enabling/disabling lights
@@ -181,10 +213,7 @@ class VirtualPetGame:
         self.animateStep = 1 #What step are we on in the animate sequence
         self.pause = False #Variable to hold game rendering (display stats)
         self.pooChangeState = False #Variable to track poo change state
-
-        self._sample = None
-        self._sine_wave = None
-        self._sine_wave_sample = None
+        self.gameOver = False #Flag for whether the pet's death has been handled
 
         # Minigame variables
         self.minigame_game_sequence = []
@@ -192,190 +221,275 @@ class VirtualPetGame:
         self.minigame_cur_round = 1
         self.minigame_hiscore = 0
 
-        self.pet = VP.VirtualPet() # Our pet! Yay!
+        self.pet = PETMODEL() # Our pet! Yay!
+        # Paces pet life ticks independent of frame rate
+        self.clock = VPC.VirtualPetClock(clock=self.timebase.monotonic_ns)
+        # Keeps the pet across resets and power loss
+        self.storage = VPST.VirtualPetStorage(backend.saveFile, clock=self.timebase.monotonic,
+                                              wallClock=self.timebase.time)
+        self.restorePet()
+
+        if (PROFILE):
+            self.profiler = VPPR.VirtualPetProfiler(backend.cpuClock)
+            self.profiler.attach(self)
+
+    #function to start the game, runs until the badge is reset
+    def run(self):
+        self.timebase.run(self.mainLoop()) # Go to game loop
+
+    # Main game loop, runs each part of the game as its own task
+    async def mainLoop(self):
+        tasks = [
+            asyncio.create_task(self.inputTask()),
+            asyncio.create_task(self.simulationTask()),
+            asyncio.create_task(self.gameTask()),
+            asyncio.create_task(self.audioTask()),
+            asyncio.create_task(self.ledTask())]
+        if (PROFILE):
+            tasks.append(asyncio.create_task(self.profilerTask()))
+        await asyncio.gather(*tasks)
+
+    # Scan the buttons and queue their events
+    async def inputTask(self):
+        while (True):
+            if (PROFILE):
+                self.profiler.begin(VPPR.P_INPUT)
+            self.input.scan()
+            if (PROFILE):
+                self.profiler.end(VPPR.P_INPUT)
+            await self.timebase.sleep(INPUTINTERVAL)
+
+    # Wait for the next button press and return the button
+    # Returns 0 if timeout seconds pass first
+    async def waitButtons(self, timeout = None):
+        if (timeout is not None):
+            deadline = self.timebase.monotonic() + timeout
+        while (True):
+            event = self.input.get()
+            while (event is not None):
+                if (event[0] == VPI.PRESS):
+                    return event[1]
+                event = self.input.get()
+            if (timeout is not None and self.timebase.monotonic() >= deadline):
+                return 0
+            await self.timebase.sleep(INPUTINTERVAL)
+
+    # Add the pet's life ticks as they fall due
+    async def simulationTask(self):
+        while (True):
+            if (not self.pet.dead):
+                if (PROFILE):
+                    self.profiler.begin(VPPR.P_LIFETICK)
+                self.pet.advance(self.clock.update())
+                self.storage.maybeSave(self.pet, self)
+                if (PROFILE):
+                    self.profiler.end(VPPR.P_LIFETICK)
+            await self.timebase.sleep(self.clock.tickInterval / VPC.NS_PER_SEC)
+
+    # Menu, actions and idle animation
+    async def gameTask(self):
+        await self.splash()
+        self.fb.clearDisplay();
+        self.renderMainLandscape()
+
+        nextFrame = self.timebase.monotonic()
+        while (True):
+            if (self.pet.dead):
+                if (not self.gameOver):
+                    # Save once so the next boot starts a new pet
+                    self.gameOver = True
+                    self.storage.save(self.pet, self)
+                    self.lightsEnabled = False
+                    self.pixels.fill(PIX_OFF)
+                    await self.dead()
+                await self.timebase.sleep(FRAMEINTERVAL)
+                continue
+
+            # Presses after one that picks an action are left for the action
+            while (self.actionSelected == ""):
+                event = self.input.get()
+                if (event is None):
+                    break
+                if (event[0] == VPI.PRESS):
+                    self.handleButtons(event[1])
+
+            if (not self.actionSelected == ""):
+                #print ("do action: " + self.actionSelected)
+                switcher = {
+                    "Snack":self.feedSnack,
+                    "Meal":self.feedMeal,
+                    "Water":self.waterPet,
+                    "Play Game":self.playMinigame,
+                    "Sleep":self.toggleSleep,
+                    "Clean":self.clean,
+                    "Doctor":self.doctor,
+                    "Discipline":self.discipline,
+                    "Display Stats":self.displayStats,
+                    "Sound":self.toggleSound,
+                    "Lights":self.toggleLights
+                }
+                func = switcher.get(self.actionSelected)
+                self.actionSelected = ""
+                if (PROFILE):
+                    self.profiler.begin(VPPR.P_ACTION)
+                await func()
+                if (PROFILE):
+                    self.profiler.end(VPPR.P_ACTION)
+                nextFrame = self.timebase.monotonic()
+
+            if (self.timebase.monotonic() >= nextFrame and not self.pet.dead):
+                if (PROFILE):
+                    self.profiler.begin(VPPR.P_IDLE)
+                self.idleAnimate()
+                self.stepAnimation()
+                if (PROFILE):
+                    self.profiler.end(VPPR.P_IDLE)
+                nextFrame += FRAMEINTERVAL
+                if (nextFrame < self.timebase.monotonic()):
+                    # Fell behind, don't try to catch up on animation frames
+                    nextFrame = self.timebase.monotonic() + FRAMEINTERVAL
+
+            if (PROFILE):
+                self.profiler.frame()
+            await self.timebase.sleep(INPUTINTERVAL)
+
+    # Menu navigation for the buttons pressed
+    def handleButtons(self, buts):
+        # Menu Action
+        if (buts & B_LEFT):
+            if (self.menuOpen == False):
+                # Main menu not already open
+                self.menuOpen = True
+                self.menuSelected = 1
+                self.subMenuSelected = 0
+                self.renderMenu(self.menuSelected, self.subMenuSelected)
+            elif (self.subMenuSelected > 0): #Submenu navigation
+                if (self.subMenuSelected == len(GAMEMENU[self.menuSelected])-1):
+                    self.subMenuSelected = 1
+                else:
+                    self.subMenuSelected = self.subMenuSelected + 1
+                self.renderMenu(self.menuSelected, self.subMenuSelected)
+            else:
+                # Main menu already open
+                if (self.menuSelected == len(GAMEMENU)): # End of the road, reset menu selected variable
+                    self.menuSelected = 1
+                else:
+                    self.menuSelected = self.menuSelected + 1
+                self.renderMenu(self.menuSelected, 0)
+
+        # Select
+        if (buts & B_MID):
+            if (self.menuOpen):
+                if (not self.menuSelected == 0):
+                    if (len(GAMEMENU[self.menuSelected]) > 1):
+                        # Menu has submenus
+                        if (self.subMenuSelected == 0):
+                            # First time visting submenu
+                            self.subMenuSelected = 1
+                            self.renderMenu(self.menuSelected, self.subMenuSelected)
+                        else:
+                            # Select submenu action
+                            self.actionSelected = GAMEMENU[self.menuSelected][self.subMenuSelected]
+                            self.resetMenu()
+                            self.renderMainLandscape()
+                    else:
+                        # Select menu action
+                        self.actionSelected = GAMEMENU[self.menuSelected][self.subMenuSelected]
+                        self.resetMenu()
+                        self.renderMainLandscape()
 
-        self.mainLoop() # Go to game loop
+        # Cancel / Close
+        if (buts & B_RIGHT):
+            self.resetMenu()
+            self.actionSelected = ""
+            self.renderMainLandscape()
 
-    # Main game loop
-    def mainLoop(self):
+    # Move the idle pet one step along its walk
+    def stepAnimation(self):
+        if (self.pet.awake):
+            if (self.animateDirection == "Left"):
+                self.currentAnimatePos = self.currentAnimatePos - 10
+                self.animateStep = self.animateStep + 1
+                if (self.currentAnimatePos < self.maxAnimateLeftPos):
+                    self.animateDirection = "Right"
+                    self.currentAnimatePos = 0
+                    self.animateStep = 1
+            else:
+                self.currentAnimatePos = self.currentAnimatePos + 10
+                self.animateStep = self.animateStep + 1
+                if (self.currentAnimatePos > self.maxAnimateRightPos):
+                    self.animateDirection = "Left"
+                    self.currentAnimatePos = SCRWIDTH-27
+                    self.animateStep = 1
+
+    # Start queued sound effects as the one playing finishes
+    async def audioTask(self):
+        while (True):
+            if (PROFILE):
+                self.profiler.begin(VPPR.P_AUDIO)
+            self.audio.update()
+            if (PROFILE):
+                self.profiler.end(VPPR.P_AUDIO)
+            await self.timebase.sleep(AUDIOINTERVAL)
+
+    # Show the pet's wellbeing on the NeoPixels
+    async def ledTask(self):
         while (True):
-            buts = pad.get_pressed()
-            if (self.lightsEnabled):
+            if (PROFILE):
+                self.profiler.begin(VPPR.P_LED)
+            if (self.lightsEnabled and not self.inMinigame):
                 if (self.pet.happiness < HEALTHDANGER or self.pet.health < HEALTHDANGER or self.pet.hunger < HEALTHDANGER):
                     #health danger
-                    pixels.fill(PIX_RED)
+                    self.pixels.fill(PIX_RED)
                 elif (self.pet.happiness < HEALTHWARNING or self.pet.health < HEALTHWARNING or self.pet.hunger < HEALTHWARNING):
                     #health warning
-                    pixels.fill(PIX_YELLOW)
+                    self.pixels.fill(PIX_YELLOW)
                 elif (self.pet.countPoops() >= 1):
-                    pixels.fill(PIX_PURPLE)
+                    self.pixels.fill(PIX_PURPLE)
                 else:
-                    pixels.fill(PIX_OFF)
+                    self.pixels.fill(PIX_OFF)
+            if (PROFILE):
+                self.profiler.end(VPPR.P_LED)
+            await self.timebase.sleep(LEDINTERVAL)
 
-            if (self.pet.dead):
-                self.dead()
-                pixels.fill(PIX_OFF)
-                self.lightsEnabled = False
-            else:
-                # Menu Action
-                if (buts & B_LEFT):
-                    if (self.menuOpen == False):
-                        # Main menu not already open
-                        self.menuOpen = True
-                        self.menuSelected = 1
-                        self.subMenuSelected = 0
-                        self.renderMenu(self.menuSelected, self.subMenuSelected)
-                    elif (self.subMenuSelected > 0): #Submenu navigation
-                        if (self.subMenuSelected == len(GAMEMENU[self.menuSelected])-1):
-                            self.subMenuSelected = 1
-                        else:
-                            self.subMenuSelected = self.subMenuSelected + 1
-                        self.renderMenu(self.menuSelected, self.subMenuSelected)
-                    else:
-                        # Main menu already open
-                        if (self.menuSelected == len(GAMEMENU)): # End of the road, reset menu selected variable
-                            self.menuSelected = 1
-                        else:
-                            self.menuSelected = self.menuSelected + 1
-                        self.renderMenu(self.menuSelected, 0)
-
-                # Select
-                if (buts & B_MID):
-                    if (self.menuOpen):
-                        if (not self.menuSelected == 0):
-                            if (len(GAMEMENU[self.menuSelected]) > 1):
-                                # Menu has submenus
-                                if (self.subMenuSelected == 0):
-                                    # First time visting submenu
-                                    self.subMenuSelected = 1
-                                    self.renderMenu(self.menuSelected, self.subMenuSelected)
-                                else:
-                                    # Select submenu action
-                                    self.actionSelected = GAMEMENU[self.menuSelected][self.subMenuSelected]
-                                    self.resetMenu()
-                                    self.clearMenuArea()
-                                    self.renderMainLandscape()
-                            else:
-                                # Select menu action
-                                self.actionSelected = GAMEMENU[self.menuSelected][self.subMenuSelected]
-                                self.resetMenu()
-                                self.clearMenuArea()
-                                self.renderMainLandscape()
-
-                # Cancel / Close
-                if (buts & B_RIGHT):
-                    self.resetMenu()
-                    self.actionSelected = ""
-                    self.clearMenuArea()
-                    self.renderMainLandscape()
-
-                while buts:
-                    # Wait for all buttons to be released.
-                    buts = pad.get_pressed()
-                    time.sleep(0.1)
-
-                # If our pet is not dead
-                # Add one tick to its life
-                self.pet.lifeTick()
-
-                if (not self.actionSelected == ""):
-                    #print ("do action: " + self.actionSelected)
-                    switcher = {
-                        "Snack":self.feedSnack,
-                        "Meal":self.feedMeal,
-                        "Water":self.waterPet,
-                        "Play Game":self.playMinigame,
-                        "Sleep":self.toggleSleep,
-                        "Clean":self.clean,
-                        "Doctor":self.doctor,
-                        "Discipline":self.discipline,
-                        "Display Stats":self.displayStats,
-                        "Sound":self.toggleSound,
-                        "Lights":self.toggleLights
-                    }
-                    func = switcher.get(self.actionSelected)
-                    func()
-                    self.actionSelected = "" #reset after doing action
-
-                if (not self.pet.dead):
-                    self.idleAnimate()
-
-                if (self.pet.awake):
-                    if (self.animateDirection == "Left"):
-                        self.currentAnimatePos = self.currentAnimatePos - 10
-                        self.animateStep = self.animateStep + 1
-                        if (self.currentAnimatePos < self.maxAnimateLeftPos):
-                            self.animateDirection = "Right"
-                            self.currentAnimatePos = 0
-                            self.animateStep = 1
-                    else:
-                        self.currentAnimatePos = self.currentAnimatePos + 10
-                        self.animateStep = self.animateStep + 1
-                        if (self.currentAnimatePos > self.maxAnimateRightPos):
-                            self.animateDirection = "Left"
-                            self.currentAnimatePos = SCRWIDTH-27
-                            self.animateStep = 1
-
-    def feedSnack(self):
+    # Print a profile report when asked for over the serial console
+    async def profilerTask(self):
+        while (True):
+            self.profiler.poll()
+            await self.timebase.sleep(PROFILEINTERVAL)
+
+    # Load the saved pet and age it by the time the badge was off
+    def restorePet(self):
+        savedAt = self.storage.restore(self.pet, self)
+        if (savedAt is None):
+            return
+        if (self.pet.dead):
+            # Saved pet had died, start over with a new one
+            self.pet = PETMODEL()
+            return
+        # Without a battery backed clock time.time() restarts on reset,
+        # in which case the pet carries on from where it was saved
+        offline = self.timebase.time() - savedAt
+        if (offline > 0):
+            self.pet.advance(int(offline * VPC.TICKRATE))
+
+    async def feedSnack(self):
         if (self.pet.awake):
-            self.feedPet("Snack")
+            await self.feedPet("Snack")
 
-    def feedMeal(self):
+    async def feedMeal(self):
         if (self.pet.awake):
-            self.feedPet("Meal")
+            await self.feedPet("Meal")
 
-    def waterPet(self):
+    async def waterPet(self):
         if (self.pet.awake):
-            self.feedPet("Water")
+            await self.feedPet("Water")
 
-    def feedPet(self, strFoodType):
+    async def feedPet(self, strFoodType):
         if (self.disciplineCheck()):
             self.fb.clearDisplay()
 
-            if (strFoodType == "Snack"):
-                self.fb.setContentsFromFile("VirtualPet/assets/snack1.txt", 0, 0)
-            elif (strFoodType == "Meal"):
-                self.fb.setContentsFromFile("VirtualPet/assets/meal1.txt", 0, 0)
-            else:
-                self.fb.setContentsFromFile("VirtualPet/assets/water1.txt", 0, 0)
-            self.fb.screenPrint()
-
-            for i in range(0, 1):
-                self.fb.setContentsFromList(self.eating1, 64, 0)
-                self.fb.screenPrint()
-                self.fb.setContentsFromList(self.eating2, 64, 0)
-                self.fb.screenPrint()
-
-            if (self.soundEnabled):
-                self.playAudio("VirtualPet/assets/audio/feedPet.wav")
-
-            if (strFoodType == "Snack"):
-                self.fb.setContentsFromFile("VirtualPet/assets/snack2.txt", 0, 0)
-            elif (strFoodType == "Meal"):
-                self.fb.setContentsFromFile("VirtualPet/assets/meal2.txt", 0, 0)
-            else:
-                self.fb.setContentsFromFile("VirtualPet/assets/water2.txt", 0, 0)
-            self.fb.screenPrint()
-
-            for i in range(0, 1):
-                self.fb.setContentsFromList(self.eating1, 64, 0)
-                self.fb.screenPrint()
-                self.fb.setContentsFromList(self.eating2, 64, 0)
-                self.fb.screenPrint()
-
-            if (strFoodType == "Snack"):
-                self.fb.setContentsFromFile("VirtualPet/assets/snack3.txt", 0, 0)
-            elif (strFoodType == "Meal"):
-                self.fb.setContentsFromFile("VirtualPet/assets/meal3.txt", 0, 0)
-            else:
-                self.fb.setContentsFromFile("VirtualPet/assets/water3.txt", 0, 0)
-            self.fb.screenPrint()
-
-            for i in range(0, 1):
-                self.fb.setContentsFromList(self.eating1, 64, 0)
-                self.fb.screenPrint()
-                self.fb.setContentsFromList(self.eating2, 64, 0)
-                self.fb.screenPrint()
+            await self.timeline.play(ANIMATIONS[strFoodType], self.soundEnabled)
 
             if (strFoodType == "Snack"):
                 self.fb.fill_rect(0, 0, 64, 64, BLACK)
@@ -400,23 +514,20 @@ class VirtualPetGame:
             self.fb.screenPrint()
         else:
             #Failed discipline check
-            self.fb.setContentsFromFile("VirtualPet/assets/faildiscipline.txt", self.currentAnimatePos, 0)
+            self.fb.drawSprite("VirtualPet/assets/faildiscipline.bin", self.currentAnimatePos, 0)
             self.fb.screenPrint()
             if (self.soundEnabled):
-                self.playAudio("VirtualPet/assets/audio/faildiscipline.wav")
+                self.audio.play("faildiscipline")
+                await self.waitAudio()
 
         self.fb.clearDisplay()
         self.renderMainLandscape()
         self.resetMenu()
 
-    def playAudio(self, file_name):
-        self.speaker_enable.value = True
-        with audioio.AudioOut(board.SPEAKER) as audio:
-            wavefile = audiocore.WaveFile(open(file_name, "rb"))
-            audio.play(wavefile)
-            while audio.playing:
-                pass
-        self.speaker_enable.value = False
+    # Wait until all queued sound effects have played
+    async def waitAudio(self):
+        while (self.audio.busy()):
+            await self.timebase.sleep(AUDIOINTERVAL)
 
     def disciplineCheck(self):
         """
@@ -437,7 +548,7 @@ class VirtualPetGame:
         # small biases
         return disciplineCheck()
 
-    def playMinigame(self):
+    async def playMinigame(self):
         """
         Code adapted from: https://medium.com/@IranNeto/building-simon-genius-game-on-the-beaglebone-with-python-d371c2bacbed
         """
@@ -445,8 +556,8 @@ class VirtualPetGame:
         self.fb.clearDisplay()
 
         while (self.inMinigame):
-            self.minigame_gen_cur_round()
-            self.minigame_get_player_input()
+            await self.minigame_gen_cur_round()
+            await self.minigame_get_player_input()
 
             # DEBUG
             #print (self.minigame_game_sequence)
@@ -454,19 +565,20 @@ class VirtualPetGame:
 
             if (not self.minigame_validate_input()):
                 self.fb.clearDisplay()
-                self.fb.setContentsFromFile("VirtualPet/assets/minigameFail.txt", 0, 0)
+                self.fb.drawStream("VirtualPet/assets/minigameFail.rle", 0, 0)
                 self.fb.screenPrint()
                 if (self.lightsEnabled):
-                    pixels.fill(PIX_RED)
-                    time.sleep(0.25)
-                    pixels.fill(PIX_OFF)
+                    self.pixels.fill(PIX_RED)
+                    await self.timebase.sleep(0.25)
+                    self.pixels.fill(PIX_OFF)
                 if (self.soundEnabled):
-                    self.play_tone(100, 1)
+                    self.audio.tone(100, 1)
+                    await self.waitAudio()
             else:
                 if (self.lightsEnabled):
-                    pixels.fill(PIX_GREEN)
-                    time.sleep(0.25)
-                    pixels.fill(PIX_OFF)
+                    self.pixels.fill(PIX_GREEN)
+                    await self.timebase.sleep(0.25)
+                    self.pixels.fill(PIX_OFF)
                 self.minigame_cur_round += 1
 
         if (self.minigame_hiscore < self.minigame_cur_round):
@@ -482,7 +594,7 @@ class VirtualPetGame:
         if (self.pet.happiness > 100):
             self.pet.happiness = 100
 
-    def minigame_gen_cur_round(self):
+    async def minigame_gen_cur_round(self):
         posX = {}
         posY = {}
         tone = {}
@@ -496,25 +608,31 @@ class VirtualPetGame:
         tone[1] = 400
         tone[2] = 440
 
-        self.fb.clearDisplay()
-        self.fb.text("Hi Score: " + str(self.minigame_hiscore), 0, 0, WHITE)
-        self.fb.text("Round: " + str(self.minigame_cur_round), 0, 8, WHITE)
-        self.fb.text("WAIT", 50, 20, WHITE)
-        self.fb.setContentsFromList(self.buttonUp, posX[0], posY[0]+20)
-        self.fb.setContentsFromList(self.buttonUp, posX[1], posY[1]+20)
-        self.fb.setContentsFromList(self.buttonUp, posX[2], posY[2]+20)
-        self.fb.screenPrint()
+        with self.fb:
+            self.fb.clearDisplay()
+            self.fb.text("Hi Score: " + str(self.minigame_hiscore), 0, 0, WHITE)
+            self.fb.text("Round: " + str(self.minigame_cur_round), 0, 8, WHITE)
+            self.fb.text("WAIT", 50, 20, WHITE)
+            self.fb.drawSprite("VirtualPet/assets/buttonUp.bin", posX[0], posY[0]+20)
+            self.fb.drawSprite("VirtualPet/assets/buttonUp.bin", posX[1], posY[1]+20)
+            self.fb.drawSprite("VirtualPet/assets/buttonUp.bin", posX[2], posY[2]+20)
         seq = random.randint(0,2)
         self.minigame_game_sequence.append(seq)
+        # The whole pattern is handed to the audio engine up front, the
+        # display below keeps in step with it: 0.25s tone then 0.5s gap
+        if (self.soundEnabled):
+            notes = []
+            for curSeq in self.minigame_game_sequence:
+                notes.append((tone[curSeq], 0.25))
+                notes.append((0, 0.5))
+            self.audio.playSequence(notes)
         for count in range(0, self.minigame_cur_round):
             curSeq = self.minigame_game_sequence[count]
-            self.fb.setContentsFromList(self.animateLeft1, posX[curSeq], posY[curSeq])
-            self.fb.setContentsFromList(self.buttonDown, posX[curSeq], posY[curSeq]+20)
+            self.fb.drawSprite("VirtualPet/assets/petWalkLeft1.bin", posX[curSeq], posY[curSeq])
+            self.fb.drawSprite("VirtualPet/assets/buttonDown.bin", posX[curSeq], posY[curSeq]+20)
             self.fb.screenPrint()
-            if (self.soundEnabled):
-                self.play_tone(tone[curSeq], 0.25)
-            time.sleep(0.5)
-            self.fb.setContentsFromList(self.buttonUp, posX[curSeq], posY[curSeq]+20)
+            await self.timebase.sleep(0.75)
+            self.fb.drawSprite("VirtualPet/assets/buttonUp.bin", posX[curSeq], posY[curSeq]+20)
             self.fb.fill_rect(posX[curSeq], posY[curSeq], 26, 20, BLACK)
             self.fb.screenPrint()
 
@@ -523,7 +641,7 @@ class VirtualPetGame:
         self.fb.screenPrint()
 
 
-    def minigame_get_player_input(self):
+    async def minigame_get_player_input(self):
         posX = {}
         posY = {}
         tone = {}
@@ -541,46 +659,27 @@ class VirtualPetGame:
             del self.minigame_player_sequence[:]
 
         number_of_plays = 0
-        play_begin_time = time.time()
-        play_end_time = time.time()
+        play_end_time = self.timebase.monotonic() + self.minigame_cur_round + 3
 
         self.fb.text("GO", 50, 20, WHITE)
         self.fb.screenPrint()
+        self.input.clear() # Ignore presses made while the sequence was shown
 
         #Give 3 seconds for every item in the sequence for the current round
-        while ((play_end_time - play_begin_time) < self.minigame_cur_round + 3):
-            buts = pad.get_pressed()
-
-            if (buts & B_LEFT):
-                self.minigame_player_sequence.append(0)
-                number_of_plays += 1
-                if (self.soundEnabled):
-                    self.play_tone(tone[0], 0.25)
-
-            if (buts & B_MID):
-                self.minigame_player_sequence.append(1)
-                number_of_plays += 1
-                if (self.soundEnabled):
-                    self.play_tone(tone[1], 0.25)
-
-            if (buts & B_RIGHT):
-                self.minigame_player_sequence.append(2)
-                number_of_plays += 1
-                if (self.soundEnabled):
-                    self.play_tone(tone[2], 0.25)
-
-            play_end_time = time.time()
-
-            while buts:
-                # Wait for all buttons to be released.
-                buts = pad.get_pressed()
-                time.sleep(0.1)
-
-            if (number_of_plays == self.minigame_cur_round):
-                break
-
-            if (number_of_plays < self.minigame_cur_round):
-                pass
+        #Presses are taken from the queue in the order they were made
+        while (self.timebase.monotonic() < play_end_time and number_of_plays < self.minigame_cur_round):
+            event = self.input.get()
+            if (event is None):
+                await self.timebase.sleep(INPUTINTERVAL)
+                continue
+            if (not event[0] == VPI.PRESS):
+                continue
+
+            seq = (B_LEFT, B_MID, B_RIGHT).index(event[1])
+            self.minigame_player_sequence.append(seq)
+            number_of_plays += 1
+            if (self.soundEnabled):
+                self.audio.tone(tone[seq], 0.25)
 
     def minigame_validate_input(self):
         if (len(self.minigame_game_sequence) != len(self.minigame_player_sequence)):
@@ -593,300 +692,182 @@ class VirtualPetGame:
 
         return True
 
-    def toggleSleep(self):
+    async def toggleSleep(self):
         if (self.pet.awake):
-            self.clearPetArea()
-            self.fb.setContentsFromList(self.AnimateSleeping, self.currentAnimatePos, 30)
+            self.drawPet("VirtualPet/assets/sleeping.bin")
             self.pet.awake = False
             self.fb.screenPrint()
             self.resetMenu()
             if (self.soundEnabled):
-                self.playAudio("VirtualPet/assets/audio/sleep.wav")
+                self.audio.play("sleep")
         else:
             self.pet.awake = True
             self.resetMenu()
 
-    def dead(self):
-        self.clearPetArea()
-        self.fb.setContentsFromFile("VirtualPet/assets/dead.txt", self.currentAnimatePos, 30)
-        self.fb.fill_rect(0, 0, SCRWIDTH-1, 29, BLACK)
-        self.fb.rect(0, 0, SCRWIDTH-1, 29, WHITE)
-        self.fb.rect(0, 0, SCRWIDTH-1, 12, WHITE)
-        self.fb.text("GAME OVER", 8, 2, WHITE)
-        self.fb.text("Press Reset", 8, 16, WHITE)
-        self.fb.screenPrint()
+    async def dead(self):
+        with self.fb:
+            self.drawPet("VirtualPet/assets/dead.bin")
+            self.fb.fill_rect(0, 0, SCRWIDTH-1, 29, BLACK)
+            self.fb.rect(0, 0, SCRWIDTH-1, 29, WHITE)
+            self.fb.rect(0, 0, SCRWIDTH-1, 12, WHITE)
+            self.fb.text("GAME OVER", 8, 2, WHITE)
+            self.fb.text("Press Reset", 8, 16, WHITE)
         if (self.soundEnabled):
-            self.playAudio("VirtualPet/assets/audio/die.wav")
+            self.audio.play("die")
+            await self.waitAudio()
 
             #Disable sound else it will loop forever until reset
             self.soundEnabled = False
 
-    def clean(self):
+    async def clean(self):
         if (self.pet.awake):
             self.pet.poopLevel = 0
             self.pooChangeState = False
-            self.fb.setContentsFromFile("VirtualPet/assets/clean1.txt", 0, 0)
-            self.fb.screenPrint()
-            if (self.soundEnabled):
-                self.playAudio("VirtualPet/assets/audio/clean.wav")
-            self.fb.setContentsFromFile("VirtualPet/assets/clean2.txt", 0, 0)
-            self.fb.screenPrint()
-            self.fb.setContentsFromFile("VirtualPet/assets/clean3.txt", 0, 0)
-            self.fb.screenPrint()
+            await self.timeline.play(ANIMATIONS["clean"], self.soundEnabled)
             self.resetMenu()
             self.fb.clearDisplay()
             self.renderMainLandscape()
 
-    def doctor(self):
+    async def doctor(self):
         if (self.pet.awake):
             if (self.pet.health < 60):
                 self.pet.health = 100
-                self.fb.setContentsFromFile("VirtualPet/assets/doctor1.txt", 0, 0)
-                self.fb.screenPrint()
-                self.fb.setContentsFromFile("VirtualPet/assets/doctor2.txt", 0, 0)
-                self.fb.screenPrint()
-                if (self.soundEnabled):
-                    self.playAudio("VirtualPet/assets/audio/doctor.wav")
-                self.fb.setContentsFromFile("VirtualPet/assets/doctor3.txt", 0, 0)
-                self.fb.screenPrint()
-                time.sleep(0.5)
+                await self.timeline.play(ANIMATIONS["doctor"], self.soundEnabled)
             else:
-                self.fb.fill_rect(10, 20, 115, 10, WHITE)
-                self.fb.text("Pet is healthy", 11, 21, BLACK)
-                self.fb.screenPrint()
-                time.sleep(3)
+                with self.fb:
+                    self.fb.fill_rect(10, 20, 115, 10, WHITE)
+                    self.fb.text("Pet is healthy", 11, 21, BLACK)
+                await self.timebase.sleep(3)
 
             self.resetMenu()
             self.fb.clearDisplay()
             self.renderMainLandscape()
 
-    def discipline(self):
+    async def discipline(self):
         if (self.pet.awake):
             self.pet.discipline += 12
             if (self.pet.discipline > 100):
                 self.pet.discipline = 100
             if ((self.pet.happiness - 3) > 0):
                 self.pet.happiness -= 3
-            self.fb.setContentsFromFile("VirtualPet/assets/discipline1.txt", 0, 0)
-            self.fb.screenPrint()
-            self.fb.setContentsFromFile("VirtualPet/assets/discipline2.txt", 0, 0)
-            self.fb.screenPrint()
-            self.fb.setContentsFromFile("VirtualPet/assets/discipline1.txt", 0, 0)
-            self.fb.screenPrint()
-            self.fb.setContentsFromFile("VirtualPet/assets/discipline2.txt", 0, 0)
-            self.fb.screenPrint()
-            if (self.soundEnabled):
-                self.playAudio("VirtualPet/assets/audio/discipline.wav")
+            await self.timeline.play(ANIMATIONS["discipline"], self.soundEnabled)
             self.resetMenu()
             self.fb.clearDisplay()
             self.renderMainLandscape()
 
-    def displayStats(self):
+    async def displayStats(self):
         lAlign = 0
         self.pause = True
 
         while (self.pause):
-            self.fb.clearDisplay()
-            #Page 1
-            self.fb.text("Pet Stats", lAlign, 2, WHITE)
-            self.fb.text("%.2f Hunger" % self.pet.hunger, lAlign, 14, WHITE)
-            self.fb.text("%.2f Happiness" % self.pet.happiness, lAlign, 26, WHITE)
-            self.fb.text("%.2f Health" % self.pet.health, lAlign, 38, WHITE)
-            self.fb.text("%.2f Discipline" %self.pet.discipline, lAlign, 50, WHITE)
-            self.fb.screenPrint()
-
-            buts = pad.get_pressed()
-            if (buts):
+            with self.fb:
+                self.fb.clearDisplay()
+                #Page 1
+                self.fb.text("Pet Stats", lAlign, 2, WHITE)
+                self.fb.text("%.2f Hunger" % self.pet.hunger, lAlign, 14, WHITE)
+                self.fb.text("%.2f Happiness" % self.pet.happiness, lAlign, 26, WHITE)
+                self.fb.text("%.2f Health" % self.pet.health, lAlign, 38, WHITE)
+                self.fb.text("%.2f Discipline" %self.pet.discipline, lAlign, 50, WHITE)
+
+            # Redraw with the latest stats until a button is pressed
+            if (await self.waitButtons(STATSINTERVAL)):
                 self.pause = False
-            while buts:
-                # Wait for all buttons to be released.
-                buts = pad.get_pressed()
-                time.sleep(0.1)
 
         self.pause = True
 
         while (self.pause):
-            self.fb.clearDisplay()
-            #Page 2
-            self.fb.text("Pet Stats", lAlign, 2, WHITE)
-            self.fb.text("%.2f Poopiness" % self.pet.poopLevel, lAlign, 14, WHITE)
-            self.fb.text("%.2f Weight" % self.pet.weight, lAlign, 26, WHITE)
-            self.fb.text("%.2f Age" % self.pet.age, lAlign, 38, WHITE)
-            self.fb.screenPrint()
-
-            buts = pad.get_pressed()
-            if (buts):
+            with self.fb:
+                self.fb.clearDisplay()
+                #Page 2
+                self.fb.text("Pet Stats", lAlign, 2, WHITE)
+                self.fb.text("%.2f Poopiness" % self.pet.poopLevel, lAlign, 14, WHITE)
+                self.fb.text("%.2f Weight" % self.pet.weight, lAlign, 26, WHITE)
+                self.fb.text("%.2f Age" % self.pet.age, lAlign, 38, WHITE)
+
+            # Redraw with the latest stats until a button is pressed
+            if (await self.waitButtons(STATSINTERVAL)):
                 self.pause = False
-            while buts:
-                # Wait for all buttons to be released.
-                buts = pad.get_pressed()
-                time.sleep(0.1)
 
         self.fb.clearDisplay()
         self.resetMenu()
         self.renderMainLandscape()
 
-    def toggleSound(self):
+    async def toggleSound(self):
         self.soundEnabled = not self.soundEnabled
         self.resetMenu()
 
-    def toggleLights(self):
+    async def toggleLights(self):
         if (self.lightsEnabled):
             self.lightsEnabled = False
-            pixels.fill(PIX_OFF)
+            self.pixels.fill(PIX_OFF)
         else:
             self.lightsEnabled = True
         self.resetMenu()
 
+    # Redraw the whole main scene from its layers
     def renderMainLandscape(self):
-        self.fb.setContentsFromList(self.background, 0, 0)
-        self.fb.setContentsFromList(self.foreground, 0, 50)
+        self.scene.set("poo", self.pooItems())
+        self.scene.invalidate()
+        self.scene.compose()
         self.fb.screenPrint()
 
     def idleAnimate(self):
-        self.clearPetArea()
         if (not self.pet.awake): #Sleeping
-            self.fb.setContentsFromList(self.AnimateSleeping, self.currentAnimatePos, 30)
+            strPet = "VirtualPet/assets/sleeping.bin"
         elif (self.animateStep % 2 == 0): #Even step
             if (self.animateDirection == "Left"):
-                self.fb.setContentsFromList(self.animateLeft2, self.currentAnimatePos, 30)
+                strPet = "VirtualPet/assets/petWalkLeft2.bin"
             else:
-                self.fb.setContentsFromList(self.animateRight2, self.currentAnimatePos, 30)
+                strPet = "VirtualPet/assets/petWalkLeft2.bin@flip"
 
         else: #Odd step
             if (self.animateDirection == "Left"):
-                self.fb.setContentsFromList(self.animateLeft1, self.currentAnimatePos, 30)
+                strPet = "VirtualPet/assets/petWalkLeft1.bin"
             else:
-                self.fb.setContentsFromList(self.animateRight1, self.currentAnimatePos, 30)
+                strPet = "VirtualPet/assets/petWalkLeft1.bin@flip"
+        self.scene.set("pet", ((strPet, self.currentAnimatePos, 30, False),))
 
+        if (not self.menuOpen):
+            poos = self.pooItems()
+            if (poos and self.pooChangeState == False):
+                self.pooChangeState = True
+                if (self.soundEnabled):
+                    self.audio.play("poo")
+            self.scene.set("poo", poos)
+
+        self.scene.compose()
         self.fb.screenPrint()
 
-        if (not self.menuOpen):
-            poopCount = self.pet.countPoops()
-            if (poopCount > 3):
-                poopCount = 3
-            if (poopCount >= 1):
-                if (self.pooChangeState == False):
-                    self.pooChangeState = True
-                    if (self.soundEnabled):
-                        self.playAudio("VirtualPet/assets/audio/poo.wav")
-
-                xPos = 0
-                for i in range(0, poopCount):
-                    self.fb.setContentsFromFile("VirtualPet/assets/poo.txt", xPos, 0)
-                    xPos += 40
-
-    # Clear out the pet idle animation area
-    def clearPetArea(self):
-        self.fb.fill_rect(0, 30, SCRWIDTH-1, 20, BLACK)
+    # Poo sprites for the pet's poop level, at most 3
+    def pooItems(self):
+        poos = []
+        for i in range(0, min(self.pet.countPoops(), 3)):
+            poos.append(("VirtualPet/assets/poo.bin", i * 40, 0, True))
+        return tuple(poos)
+
+    # Draw a pet sprite at the current animation position
+    def drawPet(self, strFileName):
+        self.scene.set("pet", ((strFileName, self.currentAnimatePos, 30, False),))
+        self.scene.compose()
 
     # Reset menu variables to default state
     def resetMenu(self):
+        self.scene.set("menu", ())
         self.menuOpen = False
         self.menuSelected = 1
         self.subMenuSelected = 0
 
     # Splash screen for start of game
-    def splash(self):
-        self.fb.setContentsFromFile("VirtualPet/splash.txt", 0, 0)
-        self.fb.text("Kevin Neubauer", 0, 40, WHITE)
-        self.fb.text("@kevinneubauer", 0, 48, WHITE)
-        self.fb.text("bit.ly/2BMEg3O", 0, 56, WHITE)
-        self.fb.screenPrint()
-        time.sleep(4)
-
-    def clearMenuArea(self):
-        self.fb.fill_rect(0, 0, SCRWIDTH-1, 29, BLACK)
-
+    async def splash(self):
+        with self.fb:
+            self.fb.drawSprite("VirtualPet/splash.bin", 0, 0)
+            self.fb.text("Kevin Neubauer", 0, 40, WHITE)
+            self.fb.text("@kevinneubauer", 0, 48, WHITE)
+            self.fb.text("bit.ly/2BMEg3O", 0, 56, WHITE)
+        await self.waitButtons(SPLASHTIME) # Any button skips the splash
+
+    # Show the menu as the scene's top layer
     def renderMenu(self, menuPos, subMenuPos):
-        self.clearMenuArea()
-
-        self.fb.rect(0, 0, SCRWIDTH-1, 29, WHITE)
-        self.fb.rect(0, 0, SCRWIDTH-1, 12, WHITE)
-        if (subMenuPos > 0): #sub menu
-            self.fb.fill_rect(0, 0, SCRWIDTH-1, 12, WHITE)
-            self.fb.fill_rect(1, 18, 1, 5, WHITE)
-            self.fb.fill_rect(2, 19, 1, 3, WHITE)
-            self.fb.fill_rect(3, 20, 1, 1, WHITE)
-            self.fb.text(GAMEMENU[menuPos][0], 8, 2, BLACK)
-            self.fb.text(GAMEMENU[menuPos][subMenuPos], 8, 16, WHITE)
-        else: #top level menu
-            if (GAMEMENU[menuPos][0] == "Sleep"):
-                self.fb.fill_rect(1, 18, 1, 5, WHITE)
-                self.fb.fill_rect(2, 19, 1, 3, WHITE)
-                self.fb.fill_rect(3, 20, 1, 1, WHITE)
-                self.fb.fill_rect(0, 0, SCRWIDTH-1, 12, WHITE)
-                self.fb.text(GAMEMENU[menuPos][0], 8, 2, BLACK)
-                self.fb.text(("Disable", "Enable")[self.pet.awake], 8, 16, WHITE)
-            elif (GAMEMENU[menuPos][0] == "Sound"):
-                self.fb.fill_rect(1, 18, 1, 5, WHITE)
-                self.fb.fill_rect(2, 19, 1, 3, WHITE)
-                self.fb.fill_rect(3, 20, 1, 1, WHITE)
-                self.fb.fill_rect(0, 0, SCRWIDTH-1, 12, WHITE)
-                self.fb.text(GAMEMENU[menuPos][0], 8, 2, BLACK)
-                self.fb.text(("Enable", "Disable")[self.soundEnabled], 8, 16, WHITE)
-            elif (GAMEMENU[menuPos][0] == "Lights"):
-                self.fb.fill_rect(1, 18, 1, 5, WHITE)
-                self.fb.fill_rect(2, 19, 1, 3, WHITE)
-                self.fb.fill_rect(3, 20, 1, 1, WHITE)
-                self.fb.fill_rect(0, 0, SCRWIDTH-1, 12, WHITE)
-                self.fb.text(GAMEMENU[menuPos][0], 8, 2, BLACK)
-                self.fb.text(("Enable", "Disable")[self.lightsEnabled], 8, 16, WHITE)
-            else:
-                self.fb.fill_rect(1, 3, 1, 5, WHITE)
-                self.fb.fill_rect(2, 4, 1, 3, WHITE)
-                self.fb.fill_rect(3, 5, 1, 1, WHITE)
-                self.fb.text(GAMEMENU[menuPos][0], 8, 2, WHITE)
-
+        self.scene.set("menu", ((self.menu.page(menuPos, subMenuPos), 0, 0, False),))
+        self.scene.compose()
         self.fb.screenPrint()
-
-    def _sine_sample(self, length):
-        tone_volume = (2 ** 15) - 1
-        shift = 2 ** 15
-        for i in range(length):
-            yield int(tone_volume * math.sin(2*math.pi*(i / length)) + shift)
-
-    def _generate_sample(self, length=100):
-        if self._sample is not None:
-            return
-        self._sine_wave = array.array("H", self._sine_sample(length))
-        self._sample = audioio.AudioOut(board.SPEAKER)
-        self._sine_wave_sample = audiocore.RawSample(self._sine_wave)
-
-    def play_tone(self, frequency, duration):
-        """ Produce a tone using the speaker. Try changing frequency to change
-        the pitch of the tone.
-
-        :param int frequency: The frequency of the tone in Hz
-        :param float duration: The duration of the tone in seconds
-        """
-        # Play a tone of the specified frequency (hz).
-        self.start_tone(frequency)
-        time.sleep(duration)
-        self.stop_tone()
-
-    def start_tone(self, frequency):
-        """ Produce a tone using the speaker. Try changing frequency to change
-        the pitch of the tone.
-
-        :param int frequency: The frequency of the tone in Hz
-        """
-        self.speaker_enable.value = True
-        length = 100
-        if length * frequency > 8000:
-            length = 8000 // frequency
-        self._generate_sample(length)
-        # Start playing a tone of the specified frequency (hz).
-        self._sine_wave_sample.sample_rate = int(len(self._sine_wave) * frequency)
-        if not self._sample.playing:
-            self._sample.play(self._sine_wave_sample, loop=True)
-
-    def stop_tone(self):
-        """ Use with start_tone to stop the tone produced.
-        """
-        # Stop playing any tones.
-        if self._sample is not None and self._sample.playing:
-            self._sample.stop()
-            self._sample.deinit()
-            self._sample = None
-        self.speaker_enable.value = False
\ No newline at end of file
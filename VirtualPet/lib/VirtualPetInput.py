@@ -0,0 +1,134 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetInput.py`
+====================================================
+
+Button event queue for virtual pet game.
+
+scan() is called regularly from a background task. It turns button changes
+into timestamped PRESS, RELEASE and LONGPRESS events in a fixed size ring
+buffer which the game reads with get(). An edge is taken on the first scan
+that sees it, then further changes of that button are ignored for DEBOUNCE
+ms, so contact bounce gives one event without delaying the press.
+
+GamePad latches presses between calls to get_pressed(), so a tap shorter
+than the scan interval still gives a PRESS (and a RELEASE on the next scan).
+Timestamps are milliseconds of the monotonic clock, wrapping at 2**32.
+* Author(s): Kevin Neubauer
+"""
+import array
+import VirtualPet.lib.VirtualPetClock as VPC
+
+PRESS = 1
+RELEASE = 2
+LONGPRESS = 3
+
+QUEUESIZE = 16 # Events held before the oldest are dropped
+DEBOUNCE = 30 # ms a button's changes are ignored for after an edge
+LONGPRESSTIME = 1000 # ms a button is held for before a LONGPRESS event
+BUTTONCOUNT = 3
+
+class VirtualPetInput:
+    def __init__(self, pad, queueSize = QUEUESIZE, debounce = DEBOUNCE,
+                 longPress = LONGPRESSTIME, clock = VPC.monotonic_ns):
+        """
+        :param pad: GamePad (or stand-in) with get_pressed() returning a bit mask
+        :param int queueSize: events held before the oldest are dropped
+        :param int debounce: ms a button's changes are ignored for after an edge
+        :param int longPress: ms a button is held for before a LONGPRESS event
+        :param clock: function returning the time in nanoseconds
+        """
+        self.pad = pad
+        self.debounce = debounce
+        self.longPress = longPress
+        self.clock = clock
+        self.size = queueSize
+        self._kinds = bytearray(queueSize)
+        self._buttons = bytearray(queueSize)
+        self._times = array.array("L", [0] * queueSize)
+        self._head = 0 #Index of the oldest event
+        self._count = 0 #Events in the queue
+        self.held = 0 #Debounced state of the buttons
+        self._edgeAt = array.array("L", [0] * BUTTONCOUNT) #Time of each button's last edge
+        self._longSent = 0 #Held buttons that have had their LONGPRESS
+        self.dropped = 0 #Events lost because the queue was full
+
+    #function to call regularly, reads the buttons and queues any events
+    def scan(self):
+        raw = self.pad.get_pressed()
+        now = (self.clock() // 1000000) & 0xFFFFFFFF
+        for i in range(BUTTONCOUNT):
+            bit = 1 << i
+            since = (now - self._edgeAt[i]) & 0xFFFFFFFF
+            if ((raw ^ self.held) & bit):
+                if (since < self.debounce):
+                    continue
+                self._edgeAt[i] = now
+                if (raw & bit):
+                    self.held |= bit
+                    self._put(PRESS, bit, now)
+                else:
+                    self.held &= ~bit
+                    self._longSent &= ~bit
+                    self._put(RELEASE, bit, now)
+            elif ((self.held & bit) and not (self._longSent & bit) and since >= self.longPress):
+                self._longSent |= bit
+                self._put(LONGPRESS, bit, now)
+
+    #function that returns the oldest event as (kind, button, time), or None
+    def get(self):
+        if (self._count == 0):
+            return None
+        i = self._head
+        self._head = (i + 1) % self.size
+        self._count -= 1
+        return (self._kinds[i], self._buttons[i], self._times[i])
+
+    #function that drains the queue and returns the buttons pressed as a bit mask
+    def pressed(self):
+        buts = 0
+        event = self.get()
+        while (event is not None):
+            if (event[0] == PRESS):
+                buts |= event[1]
+            event = self.get()
+        return buts
+
+    #function that empties the queue
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _put(self, kind, button, now):
+        if (self._count == self.size):
+            # Full, drop the oldest
+            self._head = (self._head + 1) % self.size
+            self._count -= 1
+            self.dropped += 1
+        i = (self._head + self._count) % self.size
+        self._kinds[i] = kind
+        self._buttons[i] = button
+        self._times[i] = now
+        self._count += 1
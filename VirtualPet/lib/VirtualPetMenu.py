@@ -0,0 +1,115 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetMenu.py`
+====================================================
+
+Menu pages for virtual pet game.
+
+The menu model is built once from a menu table like GAMEMENU, where each
+entry is [title, submenu items...]. A title listed in toggles shows the
+label for the current state of its setting on the second line instead.
+
+Each page, keyed by (menu position, submenu position, toggle state), is
+rendered once into a MENUWIDTH x MENUHEIGHT bitmap the first time it is
+shown and kept in a least recently used cache, so moving through the menu
+is a blit of a cached page. The cache holds MENUCACHEBYTES, enough for
+every top level page at once so scrolling round the menu doesn't evict
+the page about to be shown.
+* Author(s): Kevin Neubauer
+"""
+import VirtualPet.lib.VirtualPetSprite as VPS
+
+MENUWIDTH = 127
+MENUHEIGHT = 29
+TITLEHEIGHT = 12
+MENUCACHEBYTES = 5120 # 10 pages of 508 bytes
+
+class VirtualPetMenuPages(VPS.VirtualPetSpriteCache):
+    """
+    Sprite cache of menu pages, a page is rendered by the menu on a miss
+    """
+    def __init__(self, menu, maxBytes = MENUCACHEBYTES):
+        super().__init__(maxBytes)
+        self.menu = menu
+
+    def load(self, key):
+        return self.menu.render(key)
+
+class VirtualPetMenu:
+    def __init__(self, menu, toggles = None, cacheBytes = MENUCACHEBYTES):
+        """
+        :param menu: dict of menu position (from 1): [title, submenu items...]
+        :param toggles: dict of title: (labels, state) for items showing a setting,
+            state is a function returning the index of the label to show
+        :param int cacheBytes: bytes of rendered pages kept
+        """
+        if (toggles is None):
+            toggles = {}
+        positions = sorted(menu)
+        self.titles = [menu[pos][0] for pos in positions]
+        self.submenus = [tuple(menu[pos][1:]) for pos in positions]
+        self.toggles = [toggles.get(title) for title in self.titles]
+        self.pages = VirtualPetMenuPages(self, cacheBytes)
+
+    def __len__(self):
+        return len(self.titles)
+
+    #function that returns whether menu position menuPos shows a setting
+    def isToggle(self, menuPos):
+        return self.toggles[menuPos - 1] is not None
+
+    #function that returns the page for a menu position as a VirtualPetSprite
+    def page(self, menuPos, subMenuPos = 0):
+        toggle = self.toggles[menuPos - 1]
+        state = 0
+        if (toggle is not None and subMenuPos == 0):
+            state = int(toggle[1]())
+        return self.pages.get((menuPos, subMenuPos, state))
+
+    #function that draws the page for a (menu position, submenu position, state) key
+    def render(self, key):
+        menuPos, subMenuPos, state = key
+        sprite = VPS.VirtualPetSprite(bytearray(VPS.bufferSize(MENUWIDTH, MENUHEIGHT)), MENUWIDTH, MENUHEIGHT)
+        fb = sprite.framebuf
+        title = self.titles[menuPos - 1]
+        toggle = self.toggles[menuPos - 1]
+        fb.rect(0, 0, MENUWIDTH, MENUHEIGHT, 1)
+        if (subMenuPos > 0 or toggle is not None):
+            # Title bar, arrow by the submenu item or setting
+            fb.fill_rect(0, 0, MENUWIDTH, TITLEHEIGHT, 1)
+            self._arrow(fb, 18)
+            fb.text(title, 8, 2, 0)
+            if (subMenuPos > 0):
+                fb.text(self.submenus[menuPos - 1][subMenuPos - 1], 8, 16, 1)
+            else:
+                fb.text(toggle[0][state], 8, 16, 1)
+        else:
+            fb.rect(0, 0, MENUWIDTH, TITLEHEIGHT, 1)
+            self._arrow(fb, 3)
+            fb.text(title, 8, 2, 1)
+        return sprite
+
+    # Draws the small right pointing arrow with its tip at row top + 2
+    def _arrow(self, fb, top):
+        fb.fill_rect(1, top, 1, 5, 1)
+        fb.fill_rect(2, top + 1, 1, 3, 1)
+        fb.fill_rect(3, top + 2, 1, 1, 1)
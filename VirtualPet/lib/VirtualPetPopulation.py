@@ -0,0 +1,163 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetPopulation.py`
+====================================================
+
+Bulk simulation of many virtual pets for tuning the VirtualPet rates.
+
+Each stat is one contiguous array indexed by pet. On the host the arrays are
+NumPy float64 and a tick is a handful of vectorised operations, in the same
+order as VirtualPet.lifeTick so results match it exactly. Without NumPy
+(on device) they are array.array and each tick loops over the pets.
+
+Dead pets stop ticking, as in the game.
+* Author(s): Kevin Neubauer
+"""
+import array
+import VirtualPet.lib.VirtualPet as VP
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STATS = ("hunger", "happiness", "health", "discipline", "poopLevel", "age")
+
+class PetPopulation:
+    def __init__(self, count, model = VP.VirtualPet):
+        """
+        :param int count: The number of pets
+        :param model: VirtualPet class, or a subclass, to take the rate
+            constants and starting stats from. It is called to make each pet,
+            so pass the class rather than an instance
+        """
+        self.count = count
+        self.model = model
+        start = model()
+        if (numpy is not None):
+            for stat in STATS:
+                setattr(self, stat, numpy.full(count, float(getattr(start, stat))))
+            self.awake = numpy.full(count, bool(start.awake))
+            self.dead = numpy.zeros(count, dtype=bool)
+            self._alive = numpy.ones(count, dtype=bool)
+            self._scratch = numpy.zeros(count)
+            self._scratchMask = numpy.zeros(count, dtype=bool)
+        else:
+            for stat in STATS:
+                setattr(self, stat, array.array("f", [getattr(start, stat)] * count))
+            self.awake = bytearray([1 if start.awake else 0] * count)
+            self.dead = bytearray(count)
+        self.updateRates()
+
+    #function to refresh the per pet rates after changing awake or the model's rates
+    def updateRates(self):
+        model = self.model
+        self.agingRate = model.agingRate
+        self.healthRate = model.healthRate
+        self.poopHealthMultiplier = model.poopHealthMultiplier
+        if (numpy is not None):
+            awake = self.awake
+            self._hungerRate = numpy.where(awake, model.awakeRate["hunger"], model.sleepRate["hunger"])
+            self._happinessRate = numpy.where(awake, model.awakeRate["happiness"], model.sleepRate["happiness"])
+            self._disciplineRate = numpy.where(awake, model.awakeRate["discipline"], model.sleepRate["discipline"])
+            self._poopRate = numpy.where(awake, model.awakeRate["poop"], model.sleepRate["poop"])
+
+    #function to wake or put to sleep a single pet, only its rates change
+    def setAwake(self, index, awake):
+        self.awake[index] = awake
+        if (numpy is not None):
+            model = self.model
+            rates = model.awakeRate if awake else model.sleepRate
+            self._hungerRate[index] = rates["hunger"]
+            self._happinessRate[index] = rates["happiness"]
+            self._disciplineRate[index] = rates["discipline"]
+            self._poopRate[index] = rates["poop"]
+
+    #function that runs ticks life ticks on every living pet
+    def step(self, ticks = 1):
+        if (numpy is not None):
+            for i in range(ticks):
+                self._stepVector()
+        else:
+            for i in range(ticks):
+                self._stepLoop()
+
+    def _stepVector(self):
+        np = numpy
+        alive = np.logical_not(self.dead, out=self._alive)
+        np.subtract(self.hunger, self._hungerRate, out=self.hunger, where=alive)
+        np.subtract(self.happiness, self._happinessRate, out=self.happiness, where=alive)
+        np.subtract(self.discipline, self._disciplineRate, out=self.discipline, where=alive)
+        np.add(self.poopLevel, self._poopRate, out=self.poopLevel, where=alive)
+        np.add(self.age, self.agingRate, out=self.age, where=alive)
+        # healthRate + countPoops() * poopHealthMultiplier
+        drop = self._scratch
+        np.divide(self.poopLevel, 10, out=drop)
+        np.trunc(drop, out=drop)
+        np.multiply(drop, self.poopHealthMultiplier, out=drop)
+        np.add(drop, self.healthRate, out=drop)
+        np.subtract(self.health, drop, out=self.health, where=alive)
+        # checkOverallHealth
+        empty = self._scratchMask
+        np.less_equal(self.hunger, 0, out=empty)
+        np.logical_or(self.dead, empty, out=self.dead)
+        np.less_equal(self.health, 0, out=empty)
+        np.logical_or(self.dead, empty, out=self.dead)
+        np.less_equal(self.happiness, 0, out=empty)
+        np.logical_or(self.dead, empty, out=self.dead)
+
+    def _stepLoop(self):
+        model = self.model
+        awakeRate = model.awakeRate
+        sleepRate = model.sleepRate
+        hunger = self.hunger
+        happiness = self.happiness
+        health = self.health
+        discipline = self.discipline
+        poopLevel = self.poopLevel
+        age = self.age
+        for i in range(self.count):
+            if (self.dead[i]):
+                continue
+            rates = awakeRate if self.awake[i] else sleepRate
+            hunger[i] -= rates["hunger"]
+            happiness[i] -= rates["happiness"]
+            discipline[i] -= rates["discipline"]
+            poopLevel[i] += rates["poop"]
+            age[i] += self.agingRate
+            health[i] -= (self.healthRate + (int(poopLevel[i]/10) * self.poopHealthMultiplier))
+            if (hunger[i] <= 0 or health[i] <= 0 or happiness[i] <= 0):
+                self.dead[i] = 1
+
+    #function that returns how many pets are still alive
+    def aliveCount(self):
+        if (numpy is not None):
+            return int(self.count - numpy.count_nonzero(self.dead))
+        return self.count - sum(self.dead)
+
+    #function that returns pet index as a VirtualPet of the population's model
+    def pet(self, index):
+        pet = self.model()
+        for stat in STATS:
+            setattr(pet, stat, float(getattr(self, stat)[index]))
+        pet.awake = bool(self.awake[index])
+        pet.dead = bool(self.dead[index])
+        return pet
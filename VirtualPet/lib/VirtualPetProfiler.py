@@ -0,0 +1,189 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetProfiler.py`
+====================================================
+
+Per frame profiler for virtual pet game.
+
+Times each phase of the game loop with monotonic_ns() and counts the
+pixels drawn, sprites loaded, files opened and display bytes sent per
+frame (one pass of the game task). The last WINDOW samples of each are
+kept and report() prints their min/avg/max. Phase times are in us and
+exclude screen flushes made during them, which are timed as "flush".
+
+VirtualPetGame only uses the profiler when its PROFILE constant is set to
+1. With PROFILE = const(0) every call is compiled out on CircuitPython.
+While the game runs, press "p" in the serial console to print a report.
+Sprites read from the sprite atlas aren't counted as file opens.
+* Author(s): Kevin Neubauer
+"""
+import array
+import sys
+import VirtualPet.lib.VirtualPetClock as VPC
+try:
+    import supervisor
+except ImportError:
+    supervisor = None # Not on CircuitPython, call report() directly
+
+PHASES = ("input", "lifeTick", "action", "idleAnimate", "flush", "led", "audio")
+P_INPUT = 0
+P_LIFETICK = 1
+P_ACTION = 2
+P_IDLE = 3
+P_FLUSH = 4
+P_LED = 5
+P_AUDIO = 6
+
+COUNTERS = ("pixels", "spriteLoads", "fileOpens", "displayBytes")
+C_PIXELS = 0
+C_SPRITELOADS = 1
+C_FILEOPENS = 2
+C_DISPLAYBYTES = 3
+
+WINDOW = 32 # Samples kept of each phase and counter
+REPORTKEY = "p" # Serial console key that prints a report
+
+class VirtualPetProfiler:
+    def __init__(self, clock = VPC.monotonic_ns, window = WINDOW):
+        """
+        :param clock: function returning the time in nanoseconds
+        :param int window: samples kept of each phase and counter
+        """
+        self.clock = clock
+        self.window = window
+        self.names = PHASES + COUNTERS
+        # Rolling samples, phases in us then counters per frame
+        self.samples = [array.array("L", [0] * window) for name in self.names]
+        self.sampleCount = [0] * len(self.names)
+        self.counters = [0] * len(COUNTERS) #Running totals
+        self.frames = 0
+        self.display = None
+        self._last = [0] * len(COUNTERS)
+        self._started = [0] * len(PHASES)
+        self._flushAtStart = [0] * len(PHASES)
+        self._flushNs = 0 #Total time spent flushing, taken off the phase it happened in
+
+    #function that hooks the profiler into game's framebuffer, sprite loading and storage
+    def attach(self, game):
+        fb = game.fb
+        self.display = fb.display
+
+        screenPrint = fb.screenPrint
+        def timedScreenPrint():
+            started = self.clock()
+            screenPrint()
+            elapsed = self.clock() - started
+            self._flushNs += elapsed
+            self._add(P_FLUSH, elapsed // 1000)
+        fb.screenPrint = timedScreenPrint
+
+        markDirty = fb.markDirty
+        def countedMarkDirty(x = 0, y = 0, width = None, height = None):
+            self.counters[C_PIXELS] += (fb.width if width is None else width) * (fb.height if height is None else height)
+            markDirty(x, y, width, height)
+        fb.markDirty = countedMarkDirty
+
+        setContentsFromFile = fb.setContentsFromFile
+        def countedSetContentsFromFile(strFileName, x_origin = 0, y_origin = 0):
+            self.counters[C_FILEOPENS] += 1
+            setContentsFromFile(strFileName, x_origin, y_origin)
+        fb.setContentsFromFile = countedSetContentsFromFile
+
+        atlas = fb.atlas
+        drawStream = fb.drawStream
+        def countedDrawStream(strFileName, x_origin = None, y_origin = None):
+            if (atlas is None or strFileName not in atlas):
+                self.counters[C_FILEOPENS] += 1
+            drawStream(strFileName, x_origin, y_origin)
+        fb.drawStream = countedDrawStream
+
+        loadSprite = fb.sprites.load
+        def countedLoadSprite(strFileName):
+            self.counters[C_SPRITELOADS] += 1
+            if (atlas is None or strFileName not in atlas):
+                self.counters[C_FILEOPENS] += 1
+            return loadSprite(strFileName)
+        fb.sprites.load = countedLoadSprite
+
+        save = game.storage.save
+        def countedSave(pet, owner):
+            self.counters[C_FILEOPENS] += 1
+            save(pet, owner)
+        game.storage.save = countedSave
+
+    #function to call when phase starts
+    def begin(self, phase):
+        self._flushAtStart[phase] = self._flushNs
+        self._started[phase] = self.clock()
+
+    #function to call when phase ends, records its time less any flushes
+    def end(self, phase):
+        elapsed = self.clock() - self._started[phase] - (self._flushNs - self._flushAtStart[phase])
+        self._add(phase, max(0, elapsed) // 1000)
+
+    #function to call once per frame, records the counters for the frame
+    def frame(self):
+        if (self.display is not None):
+            self.counters[C_DISPLAYBYTES] = getattr(self.display, "bytes_written", 0)
+        for i in range(len(COUNTERS)):
+            self._add(len(PHASES) + i, self.counters[i] - self._last[i])
+            self._last[i] = self.counters[i]
+        self.frames += 1
+
+    #function that returns (min, avg, max) of the samples kept for series index
+    def stats(self, index):
+        count = min(self.sampleCount[index], self.window)
+        if (count == 0):
+            return (0, 0, 0)
+        samples = self.samples[index]
+        low = high = samples[0]
+        total = 0
+        for i in range(count):
+            value = samples[i]
+            total += value
+            if (value < low):
+                low = value
+            if (value > high):
+                high = value
+        return (low, total / count, high)
+
+    #function that prints min/avg/max of every phase and counter
+    def report(self):
+        print("frames %d, last %d samples" % (self.frames, self.window))
+        print("%-12s %10s %10s %10s %10s" % ("", "min", "avg", "max", "n/total"))
+        for i in range(len(self.names)):
+            low, avg, high = self.stats(i)
+            if (i < len(PHASES)):
+                print("%-12s %8dus %8dus %8dus %10d" % (self.names[i], low, avg, high, self.sampleCount[i]))
+            else:
+                print("%-12s %10d %10.1f %10d %10d" % (self.names[i], low, avg, high, self.counters[i - len(PHASES)]))
+
+    #function to call regularly, prints a report when REPORTKEY is pressed in the serial console
+    def poll(self):
+        if (supervisor is not None and supervisor.runtime.serial_bytes_available):
+            if (sys.stdin.read(1) == REPORTKEY):
+                self.report()
+
+    def _add(self, index, value):
+        count = self.sampleCount[index]
+        self.samples[index][count % self.window] = min(value, 0xFFFFFFFF)
+        self.sampleCount[index] = count + 1
@@ -0,0 +1,317 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetSprite.py`
+====================================================
+
+Packed 1bpp sprite format for virtual pet game assets.
+
+A .bin sprite is an 8 byte header followed by the bitmap in framebuf
+MONO_VLSB layout (one byte per column per 8 pixel page), so it can be read
+straight into a framebuf.FrameBuffer without any parsing.
+
+Header: magic "VPB1", width, height, x origin, y origin (one byte each).
+A full 128x64 screen is 8 + 1024 bytes.
+
+A .rle sprite has the same header with magic "VPR1", followed by the same
+MONO_VLSB bytes run length encoded as packets:
+
+    0x00-0x7F  n + 1 literal bytes follow (1-128)
+    0x80-0xFF  the next byte repeats n - 0x80 + RLEMINRUN times (3-130)
+
+Runs carry on across pages. The full screen scenes are mostly black and
+pack to a few hundred bytes. RLEDecoder streams a .rle file straight into
+a framebuffer's buffer, reading it RLECHUNK bytes at a time.
+* Author(s): Kevin Neubauer
+"""
+import struct
+try:
+    import framebuf
+except ImportError:
+    from VirtualPet.host import framebuf
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+MAGIC = b"VPB1"
+RLEMAGIC = b"VPR1"
+HEADERFORMAT = "<4sBBBB"
+HEADERSIZE = struct.calcsize(HEADERFORMAT)
+RLEMINRUN = 3 # Shorter runs are stored as literals
+RLEMAXRUN = 0x7F + RLEMINRUN
+RLEMAXLITERAL = 0x80
+RLECHUNK = 64 # Bytes of a .rle file read at a time
+
+# Suffixes of sprite names made from another sprite when loaded, see
+# VirtualPetSpriteCache.load: "poo.bin@flip" is poo.bin mirrored.
+# VirtualPetFramebuf.drawSprite mirrors FLIPPED sprites as it draws them
+# instead, so only the unflipped sprite is kept
+FLIPPED = "@flip"
+INVERTED = "@invert"
+
+# Number of payload bytes for a sprite of the given size
+def bufferSize(width, height):
+    return ((height + 7) // 8) * width
+
+# Returns the name of the sprite stored for strFileName and whether it is drawn mirrored
+def splitFlipped(strFileName):
+    if (strFileName.endswith(FLIPPED)):
+        return strFileName[:-len(FLIPPED)], True
+    return strFileName, False
+
+class VirtualPetSprite:
+    def __init__(self, buf, width, height, x = 0, y = 0):
+        self.buffer = buf
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.framebuf = framebuf.FrameBuffer(buf, width, height, framebuf.MONO_VLSB)
+
+class VirtualPetSpriteCache:
+    """
+    Least recently used cache of decoded sprites keyed by asset path.
+    Sprites are evicted oldest first once their buffers exceed maxBytes.
+    The most recently loaded sprite is always kept, even if it alone is
+    over budget. Sprites in atlas are taken from it rather than their own
+    files. A name ending in FLIPPED or INVERTED is made from the sprite
+    before the suffix, which is cached as well.
+    """
+    def __init__(self, maxBytes = 8192, atlas = None):
+        self.maxBytes = maxBytes
+        self.atlas = atlas
+        self.bytesUsed = 0
+        self.hits = 0
+        self.misses = 0
+        self._sprites = OrderedDict()
+
+    #function that returns a cached sprite, loading it on a miss
+    def get(self, strFileName):
+        sprite = self._sprites.pop(strFileName, None)
+        if (sprite is None):
+            self.misses += 1
+            sprite = self.load(strFileName)
+            self.bytesUsed += len(sprite.buffer)
+        else:
+            self.hits += 1
+        # Reinsert so the sprite becomes the most recently used
+        self._sprites[strFileName] = sprite
+        self._evict()
+        return sprite
+
+    #function that loads a sprite from the atlas or its file, without caching it
+    def load(self, strFileName):
+        if (strFileName.endswith(FLIPPED)):
+            return flipSprite(self.get(strFileName[:-len(FLIPPED)]))
+        if (strFileName.endswith(INVERTED)):
+            return invertSprite(self.get(strFileName[:-len(INVERTED)]))
+        if (self.atlas is not None and strFileName in self.atlas):
+            return self.atlas.sprite(strFileName)
+        return loadSprite(strFileName)
+
+    def _evict(self):
+        while (self.bytesUsed > self.maxBytes and len(self._sprites) > 1):
+            oldest = next(iter(self._sprites))
+            self.bytesUsed -= len(self._sprites.pop(oldest).buffer)
+
+    def clear(self):
+        self._sprites = OrderedDict()
+        self.bytesUsed = 0
+
+    def __len__(self):
+        return len(self._sprites)
+
+    def __contains__(self, strFileName):
+        return strFileName in self._sprites
+
+    #function to print cache counters to console
+    def consolePrint(self):
+        print("sprites: %d (%d/%d bytes) hits: %d misses: %d" % (len(self._sprites), self.bytesUsed, self.maxBytes, self.hits, self.misses))
+
+class RLEDecoder:
+    """
+    Decodes .rle sprites into the buffer behind a MONO_VLSB framebuf. The
+    file is read into one chunk buffer, reused for every sprite, and each
+    packet is written straight to the columns it covers, so no decoded
+    copy of the sprite is ever held. Runs of black or white go through
+    the framebuf's own fill_rect.
+    """
+    def __init__(self, chunkSize = RLECHUNK):
+        self.chunk = bytearray(max(chunkSize, HEADERSIZE))
+        self.view = memoryview(self.chunk)
+
+    #function that reads the header of an open sprite file, returns (magic, width, height, x, y)
+    def header(self, spriteFile):
+        if (spriteFile.readinto(self.view[:HEADERSIZE]) != HEADERSIZE):
+            raise ValueError("Not a packed sprite")
+        return struct.unpack_from(HEADERFORMAT, self.chunk)
+
+    #function that decodes the rest of an open .rle file into target at x, y
+    #buffer and stride are those of target, y must be a multiple of 8 and the
+    #sprite must fit inside target
+    def decode(self, spriteFile, target, buffer, stride, x, y, width, height):
+        chunk = self.chunk
+        view = self.view
+        firstPage = y >> 3
+        lastPage = (height - 1) >> 3
+        # Rows of the last page that belong to the sprite, the rest are kept
+        lastMask = ((1 << (height & 7)) - 1) if (height & 7) else 0xFF
+        total = (lastPage + 1) * width
+        pos = 0
+        literal = 0
+        run = 0
+        while (pos < total):
+            count = spriteFile.readinto(chunk)
+            if (not count):
+                raise ValueError("Truncated run length encoded sprite")
+            i = 0
+            while (i < count and pos < total):
+                if (literal):
+                    take = min(literal, count - i, total - pos)
+                    pos = self._write(target, buffer, stride, x, firstPage, width, lastPage, lastMask, pos, take, -1, view, i)
+                    literal -= take
+                    i += take
+                elif (run):
+                    pos = self._write(target, buffer, stride, x, firstPage, width, lastPage, lastMask, pos, min(run, total - pos), chunk[i], view, 0)
+                    run = 0
+                    i += 1
+                else:
+                    packet = chunk[i]
+                    i += 1
+                    if (packet < 0x80):
+                        literal = packet + 1
+                    else:
+                        run = packet - 0x80 + RLEMINRUN
+
+    # Writes count bytes from position pos of the sprite, a run of value or
+    # literal bytes from src at srcStart when value is -1, a page at a time
+    def _write(self, target, buffer, stride, x, firstPage, width, lastPage, lastMask, pos, count, value, src, srcStart):
+        while (count):
+            page = pos // width
+            col = pos - page * width
+            take = min(count, width - col)
+            start = (firstPage + page) * stride + x + col
+            if (page == lastPage and lastMask != 0xFF):
+                keep = ~lastMask & 0xFF
+                for i in range(take):
+                    byte = src[srcStart + i] if (value < 0) else value
+                    buffer[start + i] = (buffer[start + i] & keep) | (byte & lastMask)
+            elif (value < 0):
+                buffer[start:start + take] = src[srcStart:srcStart + take]
+            elif (value == 0x00 or value == 0xFF):
+                target.fill_rect(x + col, (firstPage + page) << 3, take, 8, value & 1)
+            else:
+                for i in range(start, start + take):
+                    buffer[i] = value
+            if (value < 0):
+                srcStart += take
+            pos += take
+            count -= take
+        return pos
+
+#function that reads a packed .bin or .rle sprite from file
+def loadSprite(strFileName):
+    with open(strFileName, "rb") as spriteFile:
+        magic, width, height, x, y = struct.unpack(HEADERFORMAT, spriteFile.read(HEADERSIZE))
+        if (magic != MAGIC and magic != RLEMAGIC):
+            raise ValueError("Not a packed sprite: " + strFileName)
+        buf = bytearray(bufferSize(width, height))
+        sprite = VirtualPetSprite(buf, width, height, x, y)
+        if (magic == RLEMAGIC):
+            RLEDecoder().decode(spriteFile, sprite.framebuf, buf, width, 0, 0, width, height)
+        else:
+            spriteFile.readinto(buf)
+    return sprite
+
+#function that returns a copy of sprite mirrored left to right
+def flipSprite(sprite):
+    width = sprite.width
+    src = sprite.buffer
+    buf = bytearray(len(src))
+    for start in range(0, len(src), width):
+        end = start + width - 1
+        for x in range(width):
+            buf[start + x] = src[end - x]
+    return VirtualPetSprite(buf, width, sprite.height, sprite.x, sprite.y)
+
+#function that returns a copy of sprite with every pixel inverted
+def invertSprite(sprite):
+    src = sprite.buffer
+    buf = bytearray(len(src))
+    for i in range(len(src)):
+        buf[i] = ~src[i] & 0xFF
+    return VirtualPetSprite(buf, sprite.width, sprite.height, sprite.x, sprite.y)
+
+#function that run length encodes MONO_VLSB bytes into .rle packets
+def encodeRLE(buf):
+    out = bytearray()
+    literalStart = 0
+    i = 0
+    length = len(buf)
+    while (i < length):
+        end = i + 1
+        while (end < length and buf[end] == buf[i] and end - i < RLEMAXRUN):
+            end += 1
+        if (end - i < RLEMINRUN):
+            i += 1
+            if (i - literalStart == RLEMAXLITERAL):
+                _appendLiteral(out, buf, literalStart, i)
+                literalStart = i
+            continue
+        _appendLiteral(out, buf, literalStart, i)
+        out.append(0x80 + end - i - RLEMINRUN)
+        out.append(buf[i])
+        i = end
+        literalStart = i
+    _appendLiteral(out, buf, literalStart, i)
+    return out
+
+def _appendLiteral(out, buf, start, end):
+    if (end > start):
+        out.append(end - start - 1)
+        out.extend(buf[start:end])
+
+#function that packs rows of 0 and 1 characters into MONO_VLSB bytes
+def packRows(listRows):
+    rows = [line.rstrip('\r\n') for line in listRows]
+    height = len(rows)
+    width = max(len(row) for row in rows)
+    buf = bytearray(bufferSize(width, height))
+    for y, row in enumerate(rows):
+        page = (y >> 3) * width
+        bit = 1 << (y & 7)
+        for x, col in enumerate(row):
+            if (col == '1'):
+                buf[page + x] |= bit
+    return buf, width, height
+
+#function that writes a packed .bin sprite to file
+def writeSprite(strFileName, buf, width, height, x = 0, y = 0):
+    with open(strFileName, "wb") as spriteFile:
+        spriteFile.write(struct.pack(HEADERFORMAT, MAGIC, width, height, x, y))
+        spriteFile.write(buf)
+
+#function that writes a run length encoded .rle sprite to file
+def writeRLESprite(strFileName, buf, width, height, x = 0, y = 0):
+    with open(strFileName, "wb") as spriteFile:
+        spriteFile.write(struct.pack(HEADERFORMAT, RLEMAGIC, width, height, x, y))
+        spriteFile.write(encodeRLE(buf))
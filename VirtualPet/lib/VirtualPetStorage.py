@@ -0,0 +1,166 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetStorage.py`
+====================================================
+
+Journaled save game storage for virtual pet game.
+
+The pet and game settings are packed into a fixed size snapshot with a
+sequence number and CRC32. Snapshots rotate through SLOTCOUNT slots of one
+preallocated file, each slot a flash erase block apart, so a slot is only
+rewritten every SLOTCOUNT saves. Restore picks the valid snapshot with the
+highest sequence number, so a save torn by a reset or power loss falls back
+to the one before it.
+
+Saves are limited to one per SAVEINTERVAL seconds. Each one is a single
+small write into an existing file, so it bounds both flash wear and the
+pause it adds to the main loop.
+
+CIRCUITPY is read only to code unless boot.py remounts it with
+storage.remount("/", readonly=False). When it is read only, saving is
+turned off and the game runs as before.
+* Author(s): Kevin Neubauer
+"""
+import struct
+import time
+try:
+    from binascii import crc32
+except ImportError:
+    from zlib import crc32
+
+SAVEFILE = "VirtualPet/pet.sav"
+SLOTCOUNT = 4
+SLOTSIZE = 4096 # One flash erase block per slot
+SAVEINTERVAL = 600 # Seconds between saves
+
+MAGIC = b"VPS1"
+# magic, sequence, saved at (time.time()), hunger, happiness, health,
+# discipline, poopLevel, weight, age, flags, minigame hiscore
+SNAPSHOTFORMAT = "<4sII7fBH"
+SNAPSHOTSIZE = struct.calcsize(SNAPSHOTFORMAT)
+CRCFORMAT = "<I"
+RECORDSIZE = SNAPSHOTSIZE + struct.calcsize(CRCFORMAT)
+
+FLAG_AWAKE = 1 << 0
+FLAG_DEAD = 1 << 1
+FLAG_SOUND = 1 << 2
+FLAG_LIGHTS = 1 << 3
+
+class VirtualPetStorage:
+    def __init__(self, strFileName = SAVEFILE, slotCount = SLOTCOUNT, saveInterval = SAVEINTERVAL,
+                 clock = time.monotonic, wallClock = time.time):
+        self.fileName = strFileName
+        self.slotCount = slotCount
+        self.saveInterval = saveInterval
+        self.clock = clock
+        self.wallClock = wallClock
+        self.enabled = strFileName is not None #Cleared when the filesystem can't be written
+        self.sequence = 0 #Sequence number of the newest snapshot
+        self.writes = 0 #Snapshots written since start up
+        self.lastSave = clock()
+        self._record = bytearray(RECORDSIZE)
+        self._allocated = False
+
+    #function that loads the newest valid snapshot into pet and game
+    #returns the time.time() it was saved at, or None if there was none
+    def restore(self, pet, game):
+        newest = None
+        if (self.fileName is None):
+            return None
+        try:
+            with open(self.fileName, "rb") as saveFile:
+                for slot in range(self.slotCount):
+                    saveFile.seek(slot * SLOTSIZE)
+                    record = saveFile.read(RECORDSIZE)
+                    snapshot = self._unpack(record)
+                    if (snapshot is not None and (newest is None or snapshot[1] > newest[1])):
+                        newest = snapshot
+        except OSError:
+            return None
+        if (newest is None):
+            return None
+
+        (magic, self.sequence, savedAt, pet.hunger, pet.happiness, pet.health,
+         pet.discipline, pet.poopLevel, pet.weight, pet.age, flags,
+         game.minigame_hiscore) = newest
+        pet.awake = bool(flags & FLAG_AWAKE)
+        pet.dead = bool(flags & FLAG_DEAD)
+        game.soundEnabled = bool(flags & FLAG_SOUND)
+        game.lightsEnabled = bool(flags & FLAG_LIGHTS)
+        return savedAt
+
+    #function that saves a snapshot if saveInterval has passed since the last one
+    def maybeSave(self, pet, game):
+        if (self.enabled and self.clock() - self.lastSave >= self.saveInterval):
+            self.save(pet, game)
+
+    #function that writes a snapshot over the oldest slot
+    def save(self, pet, game):
+        if (not self.enabled):
+            return
+        self.lastSave = self.clock()
+        flags = ((FLAG_AWAKE if pet.awake else 0) | (FLAG_DEAD if pet.dead else 0) |
+                 (FLAG_SOUND if game.soundEnabled else 0) | (FLAG_LIGHTS if game.lightsEnabled else 0))
+        sequence = self.sequence + 1
+        struct.pack_into(SNAPSHOTFORMAT, self._record, 0, MAGIC, sequence, int(self.wallClock()),
+                         pet.hunger, pet.happiness, pet.health, pet.discipline,
+                         pet.poopLevel, pet.weight, pet.age, flags, game.minigame_hiscore)
+        struct.pack_into(CRCFORMAT, self._record, SNAPSHOTSIZE,
+                         crc32(memoryview(self._record)[:SNAPSHOTSIZE]) & 0xFFFFFFFF)
+        try:
+            if (not self._allocated):
+                self._preallocate()
+                self._allocated = True
+            with open(self.fileName, "r+b") as saveFile:
+                saveFile.seek((sequence % self.slotCount) * SLOTSIZE)
+                saveFile.write(self._record)
+        except OSError:
+            # Read only filesystem, carry on without saving
+            self.enabled = False
+            return
+        self.sequence = sequence
+        self.writes += 1
+
+    # Grow the save file to full size once so saves never grow it, keeping
+    # the snapshots already in it
+    def _preallocate(self):
+        try:
+            saveFile = open(self.fileName, "r+b")
+        except OSError:
+            saveFile = open(self.fileName, "wb")
+        with saveFile:
+            saveFile.seek(0, 2)
+            size = saveFile.tell()
+            while (size < self.slotCount * SLOTSIZE):
+                # Zeros up to the end of the slot size is in
+                pad = SLOTSIZE - size % SLOTSIZE
+                saveFile.write(bytes(pad))
+                size += pad
+
+    # Returns the unpacked snapshot fields, or None if the record isn't valid
+    def _unpack(self, record):
+        if (len(record) < RECORDSIZE or record[:4] != MAGIC):
+            return None
+        crc = struct.unpack_from(CRCFORMAT, record, SNAPSHOTSIZE)[0]
+        if (crc != crc32(record[:SNAPSHOTSIZE]) & 0xFFFFFFFF):
+            return None
+        return struct.unpack_from(SNAPSHOTFORMAT, record, 0)
@@ -0,0 +1,106 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetTimeline.py`
+====================================================
+
+Animation timeline player for virtual pet game.
+
+An animation is a sequence of steps, each a tuple of
+
+    asset     sprite file (.bin or .rle), None to hold the screen
+    position  (x, y) to draw at, None for the origin in the sprite header
+    frames    frames the step stays on screen for
+    sound     sound effect started with the step, None for silence
+
+play() loads every .bin sprite of the animation before drawing the first
+step, then shows each step at a fixed frame rate. .rle frames are mostly
+full screen, so rather than being decoded into a sprite of their own they
+are streamed onto the screen with drawStream when their step comes; from
+the sprite atlas that is a seek rather than opening a file. Steps are paced against deadlines from the start of the
+animation, so a slow frame is made up on the next rather than the whole
+animation running late. A step with a sound lasts until the sound has
+finished as well, and the deadlines carry on from then.
+* Author(s): Kevin Neubauer
+"""
+FRAMERATE = 4 # Frames a second animations are played at
+AUDIOINTERVAL = 0.02 # Seconds between checks for the end of a sound
+
+class VirtualPetTimeline:
+    def __init__(self, fb, audio, timebase, frameRate = FRAMERATE):
+        """
+        :param fb: VirtualPetFramebuf to draw on
+        :param audio: VirtualPetAudio the sound cues are played on
+        :param timebase: clock with monotonic() and async sleep(seconds)
+        :param int frameRate: frames a second
+        """
+        self.fb = fb
+        self.audio = audio
+        self.timebase = timebase
+        self.frameInterval = 1 / frameRate
+
+    #function that returns every sprite used by steps, keyed by file name
+    #sprites already in the framebuffer's cache are taken from it, the rest
+    #are loaded for this animation only. .rle files not in the cache map to
+    #None, they are streamed when played
+    def preload(self, steps):
+        sprites = {}
+        for step in steps:
+            asset = step[0]
+            if (asset is None or asset in sprites):
+                continue
+            if (asset in self.fb.sprites):
+                sprites[asset] = self.fb.sprites.get(asset)
+            elif (asset.endswith(".rle")):
+                sprites[asset] = None
+            else:
+                sprites[asset] = self.fb.sprites.load(asset)
+        return sprites
+
+    #function that plays steps, sound cues are left out unless sound is True
+    async def play(self, steps, sound = True):
+        sprites = self.preload(steps)
+        timebase = self.timebase
+        deadline = timebase.monotonic()
+        for asset, position, frames, cue in steps:
+            if (asset is not None):
+                sprite = sprites[asset]
+                if (sprite is None):
+                    if (position is None):
+                        self.fb.drawStream(asset)
+                    else:
+                        self.fb.drawStream(asset, position[0], position[1])
+                else:
+                    if (position is None):
+                        x, y = sprite.x, sprite.y
+                    else:
+                        x, y = position
+                    self.fb.blit(sprite.framebuf, x, y, sprite.width, sprite.height)
+                self.fb.screenPrint()
+            deadline += frames * self.frameInterval
+            if (sound and cue is not None):
+                self.audio.play(cue)
+                while (self.audio.busy()):
+                    await timebase.sleep(AUDIOINTERVAL)
+                deadline = max(deadline, timebase.monotonic())
+            delay = deadline - timebase.monotonic()
+            if (delay > 0):
+                await timebase.sleep(delay)
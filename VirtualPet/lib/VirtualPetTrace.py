@@ -0,0 +1,216 @@
+# The MIT License (MIT)
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+"""
+`VirtualPetTrace.py`
+====================================================
+
+Record and replay of virtual pet game sessions.
+
+A trace holds what makes a session play out the way it did: the random
+seed, the pet it started with, every change of the buttons and when the
+pet's life ticks fell due. It is a dict saved as JSON:
+
+    version   TRACEVERSION
+    seed      seed of the random numbers (minigame patterns)
+    pet       starting stats, awake, sound and lights
+    duration  ms from the start of the session to the end of the trace
+    buttons   [ms, button bit mask] for each change of the buttons
+    ticks     [ms, ticks, count, period ms] runs of count clock updates
+              period ms apart that each ran ticks life ticks
+
+TraceRecorder attaches to a game before run() to record it, on the badge
+or the host. attachReplay() makes a game play a trace back instead of
+reading its buttons and clock.
+
+To record on the badge, change code.py to:
+
+    game = VPG.VirtualPetGame()
+    recorder = VPT.TraceRecorder(game)
+    try:
+        game.run()
+    except KeyboardInterrupt:
+        recorder.dump()
+
+and press Ctrl-C in the serial console when done to print the trace.
+* Author(s): Kevin Neubauer
+"""
+import json
+
+TRACEVERSION = 1
+PETSTATS = ("hunger", "happiness", "health", "discipline", "poopLevel", "weight", "age")
+NS_PER_MS = 1000000
+
+# Returns the starting state of game's pet for a trace
+def petState(game):
+    state = {}
+    for stat in PETSTATS:
+        state[stat] = getattr(game.pet, stat)
+    state["awake"] = game.pet.awake
+    state["sound"] = game.soundEnabled
+    state["lights"] = game.lightsEnabled
+    return state
+
+class TraceRecorder:
+    def __init__(self, game):
+        """
+        :param game: VirtualPetGame to record, before run() is called
+        """
+        self.timebase = game.timebase
+        self.start = self.timebase.monotonic_ns()
+        self.trace = {
+            "version": TRACEVERSION,
+            "seed": game.seed,
+            "pet": petState(game),
+            "duration": 0,
+            "buttons": [],
+            "ticks": []
+        }
+        self._held = 0
+        self._pad = game.input.pad
+        self._update = game.clock.update
+        game.input.pad = self
+        game.clock.update = self._recordTicks
+
+    #function that returns ms since recording started
+    def now(self):
+        return (self.timebase.monotonic_ns() - self.start) // NS_PER_MS
+
+    # Stands in for the game's pad, noting each change of the buttons
+    def get_pressed(self):
+        buttons = self._pad.get_pressed()
+        if (buttons != self._held):
+            self._held = buttons
+            self.trace["buttons"].append([self.now(), buttons])
+        return buttons
+
+    # Stands in for the game clock's update(), noting when ticks fall due
+    def _recordTicks(self):
+        ticks = self._update()
+        if (ticks):
+            now = self.now()
+            runs = self.trace["ticks"]
+            last = runs[-1] if runs else None
+            if (last is not None and last[1] == ticks):
+                # Extend the run if this update came about one period after the last
+                due = last[0] + last[2] * last[3]
+                if (last[2] == 1):
+                    last[3] = now - last[0]
+                    last[2] = 2
+                    return ticks
+                if (abs(now - due) * 2 <= last[3]):
+                    last[2] += 1
+                    return ticks
+            runs.append([now, ticks, 1, 0])
+        return ticks
+
+    #function that returns the trace recorded so far
+    def finish(self):
+        self.trace["duration"] = self.now()
+        return self.trace
+
+    #function that writes the trace to a JSON file
+    def save(self, strFileName):
+        with open(strFileName, "w") as traceFile:
+            json.dump(self.finish(), traceFile)
+
+    #function that prints the trace as JSON, e.g. over the serial console
+    def dump(self):
+        print(json.dumps(self.finish()))
+
+#function that loads a trace from a JSON file
+def load(strFileName):
+    with open(strFileName) as traceFile:
+        trace = json.load(traceFile)
+    if (trace.get("version") != TRACEVERSION):
+        raise ValueError("unsupported trace version")
+    return trace
+
+class ReplayPad:
+    """
+    Plays back the button changes in a trace. Like GamePad, a press that
+    came and went since the last get_pressed() is still reported once.
+    """
+    def __init__(self, trace, timebase, start):
+        self.events = trace["buttons"]
+        self.timebase = timebase
+        self.start = start
+        self.index = 0
+        self.held = 0
+
+    def get_pressed(self):
+        now = (self.timebase.monotonic_ns() - self.start) // NS_PER_MS
+        buttons = self.held
+        events = self.events
+        while (self.index < len(events) and events[self.index][0] <= now):
+            self.held = events[self.index][1]
+            buttons |= self.held
+            self.index += 1
+        return buttons
+
+class ReplayClock:
+    """
+    Stands in for VirtualPetClock, handing out life ticks when the trace
+    says they fell due rather than from the time.
+    """
+    def __init__(self, trace, timebase, start, tickInterval):
+        self.runs = trace["ticks"]
+        self.timebase = timebase
+        self.start = start
+        self.tickInterval = tickInterval
+        self.ticks = 0 #Total ticks handed out
+        self.frames = 0 #Total calls to update
+        self.tickRate = 0
+        self.frameRate = 0
+        self._run = 0 #Index of the run being played
+        self._step = 0 #Updates of that run already played
+
+    def update(self):
+        now = (self.timebase.monotonic_ns() - self.start) // NS_PER_MS
+        due = 0
+        runs = self.runs
+        while (self._run < len(runs)):
+            start, ticks, count, period = runs[self._run]
+            if (start + self._step * period > now):
+                break
+            due += ticks
+            self._step += 1
+            if (self._step >= count):
+                self._run += 1
+                self._step = 0
+        self.ticks += due
+        self.frames += 1
+        return due
+
+    def backlog(self):
+        return 0
+
+#function that makes game play back trace from now, call before run()
+#the game's random numbers must have been seeded with trace["seed"]
+def attachReplay(game, trace):
+    state = trace["pet"]
+    for stat in PETSTATS:
+        setattr(game.pet, stat, state[stat])
+    game.pet.awake = state["awake"]
+    game.soundEnabled = state["sound"]
+    game.lightsEnabled = state["lights"]
+    start = game.timebase.monotonic_ns()
+    game.input.pad = ReplayPad(trace, game.timebase, start)
+    game.clock = ReplayClock(trace, game.timebase, start, game.clock.tickInterval)
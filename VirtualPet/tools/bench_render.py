@@ -0,0 +1,171 @@
+"""
+`bench_render.py`
+====================================================
+
+Micro-benchmarks for the VirtualPetFramebuf drawing paths and the SH1106
+driver, reporting calls per second and memory allocated per call.
+
+On the host, run from the root of the repository:
+
+    python VirtualPet/tools/bench_render.py [--json results.json] [case ...]
+
+This uses HostBackend: the pure Python framebuf and the SH1106 driver on a
+recording I2C bus, so the figures are for comparing runs, not the badge.
+Naming cases runs only those whose name starts with one of them.
+
+On the badge, copy this file to the root of CIRCUITPY and
+"import bench_render" from the REPL. The same cases run on the real
+framebuf and display and the results print over serial, JSON last.
+
+Allocation is bytes allocated per call measured with gc.mem_alloc() on the
+badge. CPython has no such counter, so on the host it is the peak extra
+memory traced by tracemalloc during a call.
+* Author(s): Kevin Neubauer
+"""
+import gc
+import json
+import sys
+import time
+
+HOST = sys.implementation.name == "cpython"
+if (HOST):
+    import os
+    import tracemalloc
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lib"))
+
+import VirtualPet.lib.VirtualPetBackend as VPBE
+import VirtualPet.lib.VirtualPetFramebuf as VPB
+import VirtualPet.lib.VirtualPetSprite as VPS
+
+# Asset of each size drawn in the game: (name, text file, sprite file)
+ASSETS = (
+    ("walk", "VirtualPet/assets/petWalkLeft1.txt", "VirtualPet/assets/petWalkLeft1.bin"), # 26x20
+    ("food", "VirtualPet/assets/snack1.txt", "VirtualPet/assets/snack1.rle"), # 64x62
+    ("scene", "VirtualPet/assets/clean1.txt", "VirtualPet/assets/clean1.rle") # 128x64
+)
+MINTIME = 0.25 # Seconds each case runs for at least
+MAXCALLS = 10000
+ALLOCCALLS = 3 # Calls averaged for the allocation figure
+
+try:
+    monotonic_ns = time.monotonic_ns
+except AttributeError:
+    def monotonic_ns():
+        return int(time.monotonic() * 1000000000)
+
+# Bytes allocated by one call of func, None where it can't be measured
+def allocationPerCall(func):
+    gc.collect()
+    if (HOST):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(ALLOCCALLS):
+            func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return (peak - before) / ALLOCCALLS
+    if (not hasattr(gc, "mem_alloc")):
+        return None
+    gc.disable()
+    before = gc.mem_alloc()
+    for i in range(ALLOCCALLS):
+        func()
+    allocated = gc.mem_alloc() - before
+    gc.enable()
+    return allocated / ALLOCCALLS
+
+def timeCase(func):
+    func() # Warm up, e.g. fill the sprite cache
+    calls = 0
+    start = monotonic_ns()
+    elapsed = 0
+    while (elapsed < MINTIME * 1000000000 and calls < MAXCALLS):
+        func()
+        calls += 1
+        elapsed = monotonic_ns() - start
+    return calls, elapsed / 1000000000
+
+def buildCases(backend):
+    display = backend.display
+    fb = VPB.VirtualPetFramebuf(VPB.SCRWIDTH, VPB.SCRHEIGHT, display)
+    cases = []
+
+    for name, strFileName, spriteFileName in ASSETS:
+        with open(strFileName) as textFile:
+            rows = [line.rstrip("\r\n") for line in textFile]
+        width = len(rows[0])
+        height = len(rows)
+        # A framebuffer the size of the asset so strings wrap at its width
+        assetFb = VPB.VirtualPetFramebuf(width, height, display)
+        bits = "".join(rows)
+        cases.append(("setContentsFromString %s %dx%d" % (name, width, height),
+                      lambda assetFb=assetFb, bits=bits: assetFb.setContentsFromString(bits)))
+        cases.append(("setContentsFromList %s %dx%d" % (name, width, height),
+                      lambda assetFb=assetFb, rows=rows: assetFb.setContentsFromList(rows)))
+        cases.append(("setContentsFromFile %s %dx%d" % (name, width, height),
+                      lambda assetFb=assetFb, strFileName=strFileName: assetFb.setContentsFromFile(strFileName)))
+        cases.append(("drawSprite %s %dx%d" % (name, width, height),
+                      lambda spriteFileName=spriteFileName: fb.drawSprite(spriteFileName, 0, 0)))
+        if (spriteFileName.endswith(".rle")):
+            cases.append(("drawStream %s %dx%d" % (name, width, height),
+                          lambda spriteFileName=spriteFileName: fb.drawStream(spriteFileName, 0, 0)))
+
+    walk = VPS.loadSprite("VirtualPet/assets/petWalkLeft1.bin")
+    cases.append(("blit walk", lambda: fb.blit(walk.framebuf, 40, 30, walk.width, walk.height)))
+    cases.append(("blitMirrored walk", lambda: fb.blitMirrored(walk, 40, 30)))
+    cases.append(("fill_rect walk area", lambda: fb.fill_rect(40, 30, 26, 20, VPB.BLACK)))
+    cases.append(("rect", lambda: fb.rect(0, 0, 128, 12, VPB.WHITE)))
+    cases.append(("text", lambda: fb.text("Feed/Water", 8, 2, VPB.WHITE)))
+    cases.append(("clearDisplay", fb.clearDisplay))
+
+    def screenPrintFull():
+        fb.markDirty()
+        fb.screenPrint()
+    def screenPrintWalk():
+        fb.markDirty(40, 30, 26, 20)
+        fb.screenPrint()
+    cases.append(("screenPrint full", screenPrintFull))
+    cases.append(("screenPrint walk area", screenPrintWalk))
+    cases.append(("write_framebuf", display.write_framebuf))
+    return cases
+
+def run(backend, names = None):
+    results = {}
+    for name, func in buildCases(backend):
+        if (names and not any(name.startswith(prefix) for prefix in names)):
+            continue
+        calls, seconds = timeCase(func)
+        allocated = allocationPerCall(func)
+        results[name] = {
+            "calls": calls,
+            "seconds": seconds,
+            "opsPerSecond": calls / seconds if seconds else 0,
+            "allocBytesPerCall": allocated
+        }
+        print("%-40s %10.1f /s %10s B" % (name, results[name]["opsPerSecond"],
+                                           "n/a" if allocated is None else "%.0f" % allocated))
+    return {
+        "platform": sys.platform,
+        "implementation": sys.implementation.name,
+        "mode": "host" if HOST else "device",
+        "results": results
+    }
+
+def main(args):
+    jsonFileName = None
+    if ("--json" in args):
+        jsonFileName = args[args.index("--json") + 1]
+        args = [arg for arg in args if arg not in ("--json", jsonFileName)]
+    if (HOST):
+        backend = VPBE.HostBackend()
+    else:
+        backend = VPBE.DeviceBackend()
+    report = run(backend, args)
+    if (jsonFileName is not None):
+        with open(jsonFileName, "w") as jsonFile:
+            json.dump(report, jsonFile, indent=2, sort_keys=True)
+    elif (not HOST):
+        print(json.dumps(report))
+
+main(sys.argv[1:] if HOST else [])
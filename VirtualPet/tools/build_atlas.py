@@ -0,0 +1,35 @@
+"""
+`build_atlas.py`
+====================================================
+
+Host side build step that packs every sprite into the sprite atlas read
+by the game (see VirtualPetAtlas).
+
+Run from the root of the CIRCUITPY drive / repository, after
+regenerating the sprites with txt2bin.py:
+
+    python VirtualPet/tools/build_atlas.py [atlas file]
+
+Every .bin and .rle in VirtualPet/assets plus the splash screen is packed
+into VirtualPet/sprites.atlas unless another file is given.
+* Author(s): Kevin Neubauer
+"""
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import VirtualPet.lib.VirtualPetAtlas as VPAT
+
+def main(args):
+    strFileName = args[0] if args else VPAT.ATLASFILE
+    sprites = sorted(glob.glob("VirtualPet/assets/*.bin") + glob.glob("VirtualPet/assets/*.rle")) + ["VirtualPet/splash.bin"]
+    # Named by the paths the game draws them from
+    sprites = [sprite.replace(os.sep, "/") for sprite in sprites]
+    VPAT.writeAtlas(strFileName, sprites)
+    spriteBytes = sum(os.path.getsize(sprite) for sprite in sprites)
+    print("%s: %d sprites, %d bytes (%d bytes of sprites)" % (strFileName, len(sprites), os.path.getsize(strFileName), spriteBytes))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
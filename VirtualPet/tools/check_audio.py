@@ -0,0 +1,81 @@
+"""
+`check_audio.py`
+====================================================
+
+Checks VirtualPetAudio's queueing on the host stand-in hardware.
+
+Run from the root of the repository:
+
+    python VirtualPet/tools/check_audio.py
+
+The engine plays into HostAudioOut on a VirtualClock, which is moved
+forward by hand, and every effect started is recorded with the time it
+started. Each case prints the effects started and whether they are what
+the engine should have played.
+* Author(s): Kevin Neubauer
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lib"))
+
+import VirtualPet.host.hardware as hardware
+import VirtualPet.lib.VirtualPetAudio as VPA
+
+class RecordingAudioOut(hardware.HostAudioOut):
+    """
+    HostAudioOut that records (seconds, sample) for every sound started
+    """
+    def __init__(self, clock):
+        super().__init__(clock)
+        self.started = []
+
+    def play(self, sample, *, loop = False):
+        self.started.append((self.clock.monotonic(), sample))
+        super().play(sample, loop=loop)
+
+def makeAudio():
+    clock = hardware.VirtualClock()
+    output = RecordingAudioOut(clock)
+    audio = VPA.VirtualPetAudio(output, hardware.HostPin(), hardware.HostWaveFile,
+                                hardware.HostRawSample, clock=clock.monotonic)
+    names = dict([(id(audio.voices[name]), name) for name in audio.voices])
+    def started():
+        return [(round(at, 3), names.get(id(sample), "tone")) for at, sample in output.started]
+    return audio, clock, started
+
+def check(title, started, expected):
+    names = [name for at, name in started]
+    print("%s: %s %s" % (title, started, "ok" if names == expected else "expected %s" % expected))
+    return names == expected
+
+# The same effect asked for again after it finished, before update() ran
+def replayFinished():
+    audio, clock, started = makeAudio()
+    audio.play("poo")
+    clock.advance(audio.voices["poo"].duration + 5)
+    audio.play("poo")
+    result = check("replay finished effect", started(), ["poo", "poo"])
+    clock.advance(audio.voices["poo"].duration + 1)
+    audio.update()
+    return result and not audio.busy()
+
+# A new effect after the one playing finished, with a higher one still queued
+def queuedFirst():
+    audio, clock, started = makeAudio()
+    audio.play("feed")
+    audio.play("sleep")
+    clock.advance(audio.voices["feed"].duration + 1)
+    audio.play("poo")
+    clock.advance(audio.voices["sleep"].duration + 1)
+    audio.update()
+    clock.advance(audio.voices["poo"].duration + 1)
+    audio.update()
+    return check("queued effect first", started(), ["feed", "sleep", "poo"]) and not audio.busy()
+
+def main():
+    results = [replayFinished(), queuedFirst()]
+    print("all ok" if all(results) else "FAILED")
+
+main()
@@ -0,0 +1,120 @@
+"""
+`compare_models.py`
+====================================================
+
+Checks VirtualPetFixed against the float VirtualPet model and measures
+heap allocations per life tick.
+
+On the host, run from the root of the repository:
+
+    python VirtualPet/tools/compare_models.py
+
+On the badge, copy this file to the root of CIRCUITPY and
+"import compare_models" from the REPL. Allocations are measured with
+gc.mem_alloc() there. CPython has no such counter, so on the host they
+are the peak extra memory tracemalloc sees during each tick. That compares
+the two models but isn't what the badge will allocate: CPython caches
+small ints and reuses floats, MicroPython never allocates small ints but
+allocates every float.
+* Author(s): Kevin Neubauer
+"""
+import gc
+import sys
+import time
+
+HOST = sys.implementation.name == "cpython"
+if (HOST):
+    import os
+    import tracemalloc
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import VirtualPet.lib.VirtualPet as VP
+import VirtualPet.lib.VirtualPetFixed as VPF
+
+STATS = ("hunger", "happiness", "health", "discipline", "poopLevel", "age")
+ALLOCTICKS = 1000
+
+# Runs both models tick by tick until both die and reports the largest difference
+def compareLifetimes(awake):
+    floatPet = VP.VirtualPet()
+    fixedPet = VPF.VirtualPetFixed()
+    floatPet.awake = awake
+    fixedPet.awake = awake
+    worst = 0
+    ticks = 0
+    floatDeath = fixedDeath = None
+    while (floatDeath is None or fixedDeath is None):
+        ticks += 1
+        if (floatDeath is None):
+            floatPet.lifeTick()
+            if (floatPet.dead):
+                floatDeath = ticks
+        if (fixedDeath is None):
+            fixedPet.lifeTick()
+            if (fixedPet.dead):
+                fixedDeath = ticks
+        if (floatDeath is None and fixedDeath is None):
+            for stat in STATS:
+                worst = max(worst, abs(getattr(floatPet, stat) - getattr(fixedPet, stat)))
+    print("%s: max stat difference %.6f, death tick float %d fixed %d" %
+          (("asleep", "awake")[awake], worst, floatDeath, fixedDeath))
+
+# Checks that the fixed point fast forward is exact
+def compareAdvance(ticks):
+    iterated = VPF.VirtualPetFixed()
+    advanced = VPF.VirtualPetFixed()
+    applied = 0
+    while (applied < ticks and not iterated.dead):
+        iterated.lifeTick()
+        applied += 1
+    same = (advanced.advance(ticks) == applied and
+            all(getattr(iterated, stat) == getattr(advanced, stat) for stat in STATS))
+    print("advance(%d) matches lifeTick: %s" % (ticks, same))
+
+# Bytes allocated per lifeTick, None where it can't be measured
+def allocationsPerTick(pet):
+    if (HOST):
+        return tracedPerTick(pet)
+    if (not hasattr(gc, "mem_alloc")):
+        return None
+    gc.collect()
+    gc.disable()
+    before = gc.mem_alloc()
+    for i in range(ALLOCTICKS):
+        pet.lifeTick()
+    allocated = gc.mem_alloc() - before
+    gc.enable()
+    return allocated / ALLOCTICKS
+
+# Peak extra memory tracemalloc sees during each lifeTick, averaged, so
+# temporaries freed before the tick returns still count
+def tracedPerTick(pet):
+    gc.collect()
+    tracemalloc.start()
+    allocated = 0
+    for i in range(ALLOCTICKS):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        pet.lifeTick()
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return allocated / ALLOCTICKS
+
+def timePerTick(pet):
+    start = time.monotonic()
+    for i in range(ALLOCTICKS):
+        pet.lifeTick()
+    return (time.monotonic() - start) / ALLOCTICKS
+
+def main():
+    compareLifetimes(True)
+    compareLifetimes(False)
+    compareAdvance(50000)
+    for pet in (VP.VirtualPet(), VPF.VirtualPetFixed()):
+        allocated = allocationsPerTick(pet)
+        print("%s: %s bytes allocated, %.1f us per tick" % (
+            type(pet).__name__,
+            "n/a" if allocated is None else "%.1f" % allocated,
+            timePerTick(pet) * 1000000))
+
+main()
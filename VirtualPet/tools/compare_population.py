@@ -0,0 +1,99 @@
+"""
+`compare_population.py`
+====================================================
+
+Checks PetPopulation against the scalar VirtualPet model and measures how
+many pet ticks per second it runs.
+
+Run from the root of the repository:
+
+    python VirtualPet/tools/compare_population.py [pets] [ticks]
+
+pets random pets (200 by default), some asleep, are stepped ticks life
+ticks (5000 by default) through PetPopulation.step and, one by one,
+through VirtualPet.lifeTick, then every stat, awake and dead are compared.
+With NumPy they should be identical; without it the population keeps its
+stats as 32 bit floats, so the largest difference is reported instead.
+Half way through some pets are woken or put to sleep with setAwake.
+Throughput is timed on TIMEDPETS default pets with NumPy, or pets without.
+* Author(s): Kevin Neubauer
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import VirtualPet.lib.VirtualPet as VP
+import VirtualPet.lib.VirtualPetPopulation as VPPO
+
+TIMEDPETS = 200000
+TIMEDTICKS = 100
+
+def randomPet(rng):
+    pet = VP.VirtualPet()
+    for stat in ("hunger", "happiness", "health", "discipline"):
+        setattr(pet, stat, rng.uniform(1, 100))
+    pet.poopLevel = rng.uniform(0, 30)
+    pet.age = rng.uniform(0, 10)
+    pet.awake = rng.random() < 0.7
+    return pet
+
+# Steps count random pets both ways and returns the largest stat difference
+def compare(count, ticks, seed = 1):
+    rng = random.Random(seed)
+    pets = [randomPet(rng) for i in range(count)]
+    population = VPPO.PetPopulation(count)
+    for index in range(count):
+        for stat in VPPO.STATS:
+            getattr(population, stat)[index] = getattr(pets[index], stat)
+        population.setAwake(index, pets[index].awake)
+    toggled = rng.sample(range(count), count // 4)
+
+    for half in range(2):
+        population.step(ticks // 2)
+        for pet in pets:
+            for i in range(ticks // 2):
+                if (pet.dead):
+                    break
+                pet.lifeTick()
+        if (half == 0):
+            for index in toggled:
+                pets[index].awake = not pets[index].awake
+                population.setAwake(index, pets[index].awake)
+
+    worst = 0
+    mismatched = 0
+    for index in range(count):
+        other = population.pet(index)
+        pet = pets[index]
+        if (pet.awake != other.awake or pet.dead != other.dead):
+            mismatched += 1
+        for stat in VPPO.STATS:
+            worst = max(worst, abs(getattr(pet, stat) - getattr(other, stat)))
+    print("%d pets x %d ticks: %d dead, %d awake/dead mismatches, max stat difference %g" % (
+        count, ticks, sum(1 for pet in pets if pet.dead), mismatched, worst))
+    return mismatched == 0 and (worst == 0 or VPPO.numpy is None)
+
+def throughput(count, ticks):
+    population = VPPO.PetPopulation(count)
+    population.step()
+    start = time.perf_counter()
+    population.step(ticks)
+    elapsed = time.perf_counter() - start
+    print("%d pets x %d ticks in %.3f s: %.1fM pet ticks per second (%s)" % (
+        count, ticks, elapsed, count * ticks / elapsed / 1000000,
+        "NumPy" if VPPO.numpy is not None else "array.array"))
+
+def main(args):
+    count = int(args[0]) if args else 200
+    ticks = int(args[1]) if len(args) > 1 else 5000
+    same = compare(count, ticks)
+    print("population matches lifeTick: %s" % same)
+    if (VPPO.numpy is not None):
+        throughput(TIMEDPETS, TIMEDTICKS)
+    else:
+        throughput(count, TIMEDTICKS)
+
+main(sys.argv[1:])
@@ -0,0 +1,105 @@
+"""
+`compare_rle.py`
+====================================================
+
+Compares the run length encoded .rle sprite format with the raw packed
+.bin format for every asset: file size and time to draw one frame from
+file onto the screen.
+
+Run from the root of the repository:
+
+    python VirtualPet/tools/compare_rle.py [--json results.json] [file.txt ...]
+
+Each asset is packed both ways from its .txt source into a temporary
+directory. A raw frame is drawn the way an uncached drawSprite does it,
+reading the whole bitmap then blitting it; an .rle frame is streamed with
+drawStream. Both draw at (0, 0) on the HostBackend screen, so times are
+for comparing formats, not what the badge will do (see bench_render.py).
+* Author(s): Kevin Neubauer
+"""
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lib"))
+
+import VirtualPet.lib.VirtualPetBackend as VPBE
+import VirtualPet.lib.VirtualPetFramebuf as VPB
+import VirtualPet.lib.VirtualPetSprite as VPS
+
+MINTIME = 0.2 # Seconds each draw is timed for at least
+
+def timeDraw(func):
+    func()
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while (elapsed < MINTIME):
+        func()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / calls * 1000000
+
+def compare(fb, strFileName, tempDir):
+    with open(strFileName) as textFile:
+        buf, width, height = VPS.packRows(textFile.readlines())
+    name = os.path.splitext(os.path.basename(strFileName))[0]
+    binFileName = os.path.join(tempDir, name + ".bin")
+    rleFileName = os.path.join(tempDir, name + ".rle")
+    VPS.writeSprite(binFileName, buf, width, height)
+    VPS.writeRLESprite(rleFileName, buf, width, height)
+
+    def drawRaw():
+        sprite = VPS.loadSprite(binFileName)
+        fb.blit(sprite.framebuf, 0, 0, sprite.width, sprite.height)
+    def drawStream():
+        fb.drawStream(rleFileName, 0, 0)
+
+    drawRaw()
+    raw = bytes(fb.buffer)
+    drawStream()
+    if (bytes(fb.buffer) != raw):
+        raise ValueError("decoded .rle differs from .bin: " + strFileName)
+    return {
+        "size": [width, height],
+        "binBytes": os.path.getsize(binFileName),
+        "rleBytes": os.path.getsize(rleFileName),
+        "binUs": timeDraw(drawRaw),
+        "rleUs": timeDraw(drawStream)
+    }
+
+def main(args):
+    jsonFileName = None
+    if ("--json" in args):
+        jsonFileName = args[args.index("--json") + 1]
+        args = [arg for arg in args if arg not in ("--json", jsonFileName)]
+    files = args or sorted(glob.glob("VirtualPet/assets/*.txt")) + ["VirtualPet/splash.txt"]
+    fb = VPB.VirtualPetFramebuf(VPB.SCRWIDTH, VPB.SCRHEIGHT, VPBE.HostBackend().display)
+
+    results = {}
+    tempDir = tempfile.mkdtemp()
+    try:
+        print("%-16s %8s %8s %8s %8s %10s %10s" % ("asset", "size", ".bin B", ".rle B", "ratio", ".bin us", ".rle us"))
+        for strFileName in files:
+            name = os.path.splitext(os.path.basename(strFileName))[0]
+            result = compare(fb, strFileName, tempDir)
+            results[name] = result
+            print("%-16s %8s %8d %8d %7.1f%% %10.1f %10.1f" % (
+                name, "%dx%d" % tuple(result["size"]), result["binBytes"], result["rleBytes"],
+                100.0 * result["rleBytes"] / result["binBytes"], result["binUs"], result["rleUs"]))
+    finally:
+        shutil.rmtree(tempDir)
+
+    binTotal = sum(result["binBytes"] for result in results.values())
+    rleTotal = sum(result["rleBytes"] for result in results.values())
+    print("total %d -> %d bytes (%.1f%%)" % (binTotal, rleTotal, 100.0 * rleTotal / binTotal))
+    if (jsonFileName is not None):
+        with open(jsonFileName, "w") as jsonFile:
+            json.dump(results, jsonFile, indent=2, sort_keys=True)
+
+main(sys.argv[1:])
@@ -0,0 +1,269 @@
+"""
+`replay.py`
+====================================================
+
+Replays a recorded session (see VirtualPetTrace) headless on the host as
+fast as possible and reports how hard the game worked.
+
+Run from the root of the repository:
+
+    python VirtualPet/tools/replay.py [trace.json] [--json results.json]
+    python VirtualPet/tools/replay.py --write trace.json
+
+With no trace file a built in session is replayed: it feeds the pet,
+plays the minigame, goes through the care actions, stats and sleep, idles
+and then fast forwards until the pet dies. --write saves that session as
+a trace file instead.
+
+The replay runs on the virtual clock, so game time costs nothing and wall
+time is only the CPU spent running the game. Reported: screen updates per
+second, life ticks per second, pixels drawn, display bytes sent and wall
+time spent in each phase of the game.
+* Author(s): Kevin Neubauer
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lib"))
+
+import VirtualPet.lib.VirtualPetGame as VPG
+import VirtualPet.lib.VirtualPetBackend as VPBE
+import VirtualPet.lib.VirtualPetTrace as VPT
+
+# Game coroutine: phase it is reported under
+ACTIONPHASES = {
+    "splash": "splash",
+    "feedSnack": "feeding",
+    "feedMeal": "feeding",
+    "waterPet": "feeding",
+    "playMinigame": "minigame",
+    "toggleSleep": "care",
+    "clean": "care",
+    "doctor": "care",
+    "discipline": "care",
+    "displayStats": "stats",
+    "toggleSound": "settings",
+    "toggleLights": "settings",
+    "dead": "death"
+}
+
+class PhaseTimer:
+    def __init__(self, timebase):
+        self.timebase = timebase
+        self.current = "idle"
+        self.wall = {}
+        self.game = {}
+        self.frames = {}
+        self._wallStart = time.perf_counter()
+        self._gameStart = timebase.monotonic()
+
+    #function that switches to phase name and returns the previous phase
+    def enter(self, name):
+        now = time.perf_counter()
+        gameNow = self.timebase.monotonic()
+        previous = self.current
+        self.wall[previous] = self.wall.get(previous, 0) + now - self._wallStart
+        self.game[previous] = self.game.get(previous, 0) + gameNow - self._gameStart
+        self._wallStart = now
+        self._gameStart = gameNow
+        self.current = name
+        return previous
+
+    def frame(self):
+        self.frames[self.current] = self.frames.get(self.current, 0) + 1
+
+class CountingFramebuf:
+    """
+    Wraps a FrameBuffer and counts the pixels drawn through it
+    """
+    def __init__(self, framebuf, width, height):
+        self.framebuf = framebuf
+        self.width = width
+        self.height = height
+        self.pixels = 0
+
+    def pixel(self, x, y, c = None):
+        if (c is not None):
+            self.pixels += 1
+        return self.framebuf.pixel(x, y, c)
+
+    def fill(self, c):
+        self.pixels += self.width * self.height
+        self.framebuf.fill(c)
+
+    def fill_rect(self, x, y, w, h, c):
+        self.pixels += w * h
+        self.framebuf.fill_rect(x, y, w, h, c)
+
+    def rect(self, x, y, w, h, c):
+        self.pixels += 2 * (w + h) - 4
+        self.framebuf.rect(x, y, w, h, c)
+
+    def hline(self, x, y, w, c):
+        self.pixels += w
+        self.framebuf.hline(x, y, w, c)
+
+    def vline(self, x, y, h, c):
+        self.pixels += h
+        self.framebuf.vline(x, y, h, c)
+
+    def text(self, s, x, y, c = 1):
+        self.pixels += len(s) * 64
+        self.framebuf.text(s, x, y, c)
+
+    def blit(self, fbuf, x, y, *args):
+        self.pixels += fbuf.width * fbuf.height
+        self.framebuf.blit(fbuf, x, y, *args)
+
+# Built in session, as button taps and pauses
+def builtinTrace():
+    buttons = []
+    at = [1000]
+    def tap(mask, times = 1):
+        for i in range(times):
+            buttons.append([at[0], mask])
+            buttons.append([at[0] + 100, 0])
+            at[0] += 400
+    def wait(seconds):
+        at[0] += int(seconds * 1000)
+
+    left, mid = VPG.B_LEFT, VPG.B_MID
+    tap(mid) # Skip the splash screen
+    wait(2)
+    tap(left); tap(mid); tap(mid) # Feed/Water > Snack
+    wait(10)
+    tap(left); tap(mid); tap(left); tap(mid) # Feed/Water > Meal
+    wait(10)
+    tap(left, 2); tap(mid) # Play Game
+    wait(2.5); tap(left) # Answer the first round
+    wait(12)
+    tap(left, 4); tap(mid) # Clean
+    wait(10)
+    tap(left, 5); tap(mid) # Doctor
+    wait(10)
+    tap(left, 6); tap(mid) # Discipline
+    wait(10)
+    tap(left, 7); tap(mid) # Display Stats, both pages
+    wait(2); tap(mid); wait(2); tap(mid)
+    wait(2)
+    tap(left, 3); tap(mid) # Sleep, then wake up
+    wait(30)
+    tap(left, 3); tap(mid)
+    wait(600) # Idle
+    deathAt = at[0]
+    wait(20) # Fast forward until the pet dies, then watch it go
+
+    pet = VPG.PETMODEL()
+    return {
+        "version": VPT.TRACEVERSION,
+        "seed": 1,
+        "pet": dict([(stat, getattr(pet, stat)) for stat in VPT.PETSTATS] +
+                    [("awake", True), ("sound", True), ("lights", True)]),
+        "duration": at[0],
+        "buttons": buttons,
+        "ticks": [[1000, 1, deathAt // 1000 - 1, 1000], [deathAt, 1000000, 1, 0]]
+    }
+
+async def runFor(game, seconds):
+    task = asyncio.create_task(game.mainLoop())
+    await game.timebase.sleep(seconds)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+def replay(trace):
+    backend = VPBE.HostBackend(seed=trace["seed"])
+    game = VPG.VirtualPetGame(backend)
+    VPT.attachReplay(game, trace)
+    phases = PhaseTimer(backend.clock)
+
+    # Time each phase of the game by wrapping the coroutines that run it
+    def timed(name, func):
+        async def wrapper(*args):
+            previous = phases.enter(name)
+            try:
+                return await func(*args)
+            finally:
+                phases.enter(previous)
+        return wrapper
+    for method in ACTIONPHASES:
+        setattr(game, method, timed(ACTIONPHASES[method], getattr(game, method)))
+
+    handleButtons = game.handleButtons
+    def menuButtons(buts):
+        handleButtons(buts)
+        if (phases.current in ("idle", "menu")):
+            phases.enter("menu" if game.menuOpen else "idle")
+    game.handleButtons = menuButtons
+
+    fb = game.fb
+    counter = CountingFramebuf(fb.framebuf, fb.width, fb.height)
+    fb.framebuf = counter
+    blitMirrored = fb.blitMirrored
+    def countedBlitMirrored(sprite, x, y, key = -1):
+        counter.pixels += sprite.width * sprite.height # Writes the buffer, not through framebuf
+        blitMirrored(sprite, x, y, key)
+    fb.blitMirrored = countedBlitMirrored
+    screenPrint = fb.screenPrint
+    def countedScreenPrint():
+        if (fb.isDirty() and fb.frameDepth == 0):
+            phases.frame()
+        screenPrint()
+    fb.screenPrint = countedScreenPrint
+
+    start = time.perf_counter()
+    backend.clock.run(runFor(game, trace["duration"] / 1000))
+    wall = time.perf_counter() - start
+    phases.enter(phases.current)
+
+    frames = sum(phases.frames.values())
+    return {
+        "wall": wall,
+        "gameTime": backend.clock.monotonic(),
+        "frames": frames,
+        "framesPerSecond": frames / wall,
+        "lifeTicks": game.clock.ticks,
+        "lifeTicksPerSecond": game.clock.ticks / wall,
+        "pixels": counter.pixels,
+        "displayBytes": backend.i2c.bytes_written,
+        "displayTransactions": backend.i2c.transactions,
+        "dead": game.pet.dead,
+        "phases": dict([(name, {"wall": phases.wall[name], "gameTime": phases.game[name],
+                                "frames": phases.frames.get(name, 0)}) for name in phases.wall])
+    }
+
+def printResults(results):
+    print("%.1f s of game time replayed in %.3f s, pet %s" % (
+        results["gameTime"], results["wall"], "died" if results["dead"] else "alive"))
+    print("%d screen updates, %.0f per second" % (results["frames"], results["framesPerSecond"]))
+    print("%d life ticks, %.0f per second" % (results["lifeTicks"], results["lifeTicksPerSecond"]))
+    print("%d pixels drawn, %d display bytes in %d transactions" % (
+        results["pixels"], results["displayBytes"], results["displayTransactions"]))
+    print("%-10s %10s %10s %8s" % ("phase", "wall s", "game s", "frames"))
+    for name in sorted(results["phases"]):
+        phase = results["phases"][name]
+        print("%-10s %10.3f %10.1f %8d" % (name, phase["wall"], phase["gameTime"], phase["frames"]))
+
+def main(args):
+    jsonFileName = None
+    if ("--json" in args):
+        jsonFileName = args[args.index("--json") + 1]
+        args = [arg for arg in args if arg not in ("--json", jsonFileName)]
+    if ("--write" in args):
+        with open(args[args.index("--write") + 1], "w") as traceFile:
+            json.dump(builtinTrace(), traceFile)
+        return
+    trace = VPT.load(args[0]) if args else builtinTrace()
+    results = replay(trace)
+    printResults(results)
+    if (jsonFileName is not None):
+        with open(jsonFileName, "w") as resultsFile:
+            json.dump(results, resultsFile, indent=2, sort_keys=True)
+
+main(sys.argv[1:])
@@ -0,0 +1,48 @@
+"""
+`run_host.py`
+====================================================
+
+Runs the game headless on a PC using HostBackend and reports what it did.
+
+Run from the root of the repository:
+
+    python VirtualPet/tools/run_host.py [seconds]
+
+The game runs for the given number of seconds of virtual time (an hour by
+default) with no buttons pressed, as fast as the CPU allows.
+* Author(s): Kevin Neubauer
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lib"))
+
+import VirtualPet.lib.VirtualPetGame as VPG
+import VirtualPet.lib.VirtualPetBackend as VPBE
+
+async def runFor(game, seconds):
+    task = asyncio.create_task(game.mainLoop())
+    await game.timebase.sleep(seconds)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+def main(args):
+    seconds = float(args[0]) if args else 3600
+    backend = VPBE.HostBackend()
+    game = VPG.VirtualPetGame(backend)
+    start = time.perf_counter()
+    backend.clock.run(runFor(game, seconds))
+    wall = time.perf_counter() - start
+    print("%.0f s of game time in %.2f s" % (backend.clock.monotonic(), wall))
+    print("life ticks %d, hunger %.2f, dead %s" % (game.clock.ticks, game.pet.hunger, game.pet.dead))
+    print("display %d bytes in %d transactions" % (backend.i2c.bytes_written, backend.i2c.transactions))
+    print("sounds %d, neopixel updates %d" % (backend.audioOut.plays, backend.pixels.writes))
+    game.fb.sprites.consolePrint()
+
+main(sys.argv[1:])
@@ -0,0 +1,60 @@
+"""
+`txt2bin.py`
+====================================================
+
+Host side converter from 0/1 text art to packed .bin and .rle sprites.
+
+Run from the root of the CIRCUITPY drive / repository:
+
+    python VirtualPet/tools/txt2bin.py [file.txt ...]
+
+With no arguments every asset in VirtualPet/assets plus the splash screen
+is converted. Each sprite is written next to its .txt source, as a .rle
+for the full screen animation frames in STREAMED and a .bin otherwise.
+* Author(s): Kevin Neubauer
+"""
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+import VirtualPet.lib.VirtualPetSprite as VPS
+
+# Default draw origin stored in the header, keyed by asset name
+ORIGINS = {
+    "foreground": (0, 50),
+}
+
+# Animation frames drawn with drawStream, written run length encoded
+STREAMED = (
+    "clean1", "clean2", "clean3",
+    "doctor1", "doctor2", "doctor3",
+    "discipline1", "discipline2",
+    "minigameFail",
+    "meal1", "meal2", "meal3",
+    "snack1", "snack2", "snack3",
+    "water1", "water2", "water3"
+)
+
+def convert(strFileName):
+    with open(strFileName) as textFile:
+        buf, width, height = VPS.packRows(textFile.readlines())
+    name = os.path.splitext(os.path.basename(strFileName))[0]
+    x, y = ORIGINS.get(name, (0, 0))
+    if (name in STREAMED):
+        binFileName = os.path.splitext(strFileName)[0] + ".rle"
+        VPS.writeRLESprite(binFileName, buf, width, height, x, y)
+    else:
+        binFileName = os.path.splitext(strFileName)[0] + ".bin"
+        VPS.writeSprite(binFileName, buf, width, height, x, y)
+    return binFileName, os.path.getsize(strFileName), os.path.getsize(binFileName)
+
+def main(args):
+    files = args or sorted(glob.glob("VirtualPet/assets/*.txt")) + ["VirtualPet/splash.txt"]
+    for strFileName in files:
+        binFileName, txtSize, binSize = convert(strFileName)
+        print("%s: %d -> %d bytes" % (binFileName, txtSize, binSize))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
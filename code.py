@@ -1,3 +1,3 @@
 import VirtualPet.lib.VirtualPetGame as VPG
 
-VPG.VirtualPetGame()
\ No newline at end of file
+VPG.VirtualPetGame().run()
\ No newline at end of file
@@ -30,8 +30,16 @@ MicroPython SH1106 OLED driver, I2C and SPI interfaces
 
 import time
 
-from micropython import const
-import framebuf
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+try:
+    import framebuf
+except ImportError:
+    # Headless on a PC, see VirtualPet/host
+    from VirtualPet.host import framebuf
 
 __version__ = "0.0.0-auto.0"
 __repo__ = "https://github.com/winneymj/Adafruit_CircuitPython_SH1106.git"
@@ -140,6 +148,10 @@ class _SH1106:
         """Derived class must implement this"""
         raise NotImplementedError
 
+    def write_pages(self, pages, col_start=0, col_end=None):
+        """Derived class must implement this"""
+        raise NotImplementedError
+
     def write_cmd(self, cmd):
         """Derived class must implement this"""
         raise NotImplementedError
@@ -155,9 +167,16 @@ class _SH1106:
             time.sleep(0.010)
         self.write_cmd(SET_DISP_ON)
 
-    def show(self):
-        """Update the display"""
-        self.write_framebuf()
+    def show(self, region=None):
+        """Update the display
+
+        :param region: optional (pages, col_start, col_end) tuple limiting
+            the update to a column range of some pages, full screen if None
+        """
+        if region is None:
+            self.write_framebuf()
+        else:
+            self.write_pages(*region)
 
 class SH1106_I2C(_SH1106):
     """
@@ -175,48 +194,79 @@ class SH1106_I2C(_SH1106):
         self.i2c_bus = i2c
         self.addr = addr
         self.temp = bytearray(2)
-        # Add an extra byte to the data buffer to hold an I2C data/command byte
-        # to use hardware-compatible I2C transactions.  A memoryview of the
-        # buffer is used to mask this byte from the framebuffer operations
-        # (without a major memory hit as memoryview doesn't copy to a separate
-        # buffer).
-        self.buffer = bytearray(((height // 8) * width))
-        #self.buffer[0] = 0x40  # Set first byte of data buffer to Co=0, D/C=1
-        framebuffer = framebuf.FrameBuffer1(memoryview(self.buffer)[1:], width, height)
+        # Page address, lower and higher column commands sent as one transaction
+        self.page_cmd = bytearray(4)
+        self.page_cmd[0] = 0x00 # Co = 0, D/C = 0
+        # Bytes sent on the bus including the address byte, and transactions
+        self.bytes_written = 0
+        self.transactions = 0
+        # Each page row is stored with a leading I2C data/command byte so it
+        # can be sent without copying:
+        #   [0x40][col 0 .. col width-1][0x40][col 0 ...
+        # The framebuffer views the buffer from byte 1 with a stride of
+        # width + 1, so the control bytes sit in the column past the right
+        # edge of the previous page and are never drawn over. One byte more
+        # than the pages take so the view from byte 1 is still a full
+        # pages * stride bytes.
+        self.stride = width + 1
+        self.buffer = bytearray((height // 8) * self.stride + 1)
+        for page in range(height // 8):
+            self.buffer[page * self.stride] = 0x40 # Co = 0, D/C = 1
+        framebuffer = framebuf.FrameBuffer(memoryview(self.buffer)[1:], width, height,
+                                           framebuf.MONO_VLSB, self.stride)
         super().__init__(framebuffer, width, height, external_vcc, reset)
 
+    def _lock(self):
+        while not self.i2c_bus.try_lock():
+            pass
+
+    def _write(self, buffer, start=0, end=None):
+        if end is None:
+            end = len(buffer)
+        self.i2c_bus.writeto(self.addr, buffer, start=start, end=end)
+        self.bytes_written += end - start + 1
+        self.transactions += 1
+
     def write_cmd(self, cmd):
         """Send a command to the I2C device"""
         self.temp[0] = 0x00 # Co = 0, D/C = 0
         self.temp[1] = cmd
-        self.i2c_bus.try_lock()
-        self.i2c_bus.writeto(self.addr, self.temp)
+        self._lock()
+        try:
+            self._write(self.temp)
+        finally:
+            self.i2c_bus.unlock()
 
     def write_framebuf(self):
         """write to the frame buffer via I2C"""
-
-        self.i2c_bus.try_lock()
-        write = self.i2c_bus.writeto
-        write_cmd = self.write_cmd
-        tmp_buf = bytearray(1)
-        tmp_buf[0] = 0x40 # Co = 0, D/C = 1
-
-        local_buffer = bytearray(self.width+1)
-
-        for page in range(0, 8): # Pages
-            page_mult = (page << 7)
-            write_cmd(0xB0 + page) # set page address
-            write_cmd(0x02) # set lower column address
-            write_cmd(0x10) # set higher column address
-
-            # Not sure if there is a way to do this without a local buffer
-            # as we need to peprend a databyte onto the framebuffer data being sent.
-            local_buffer = self.buffer[page_mult:page_mult + self.width + 2]
-            local_buffer[:0] = tmp_buf # prepend Co = 0, D/C = 1
-
-            write(self.addr, local_buffer)
-
-        self.i2c_bus.unlock()
+        self.write_pages(range(self.height // 8))
+
+    def write_pages(self, pages, col_start=0, col_end=None):
+        """write a column range of the given pages via I2C"""
+        if col_end is None:
+            col_end = self.width
+        column = col_start + 2 # SH1106 RAM is 132 columns, the panel starts at 2
+        page_cmd = self.page_cmd
+        page_cmd[2] = SET_LOW_COLUMN | (column & 0x0F)
+        page_cmd[3] = SET_HIGH_COLUMN | (column >> 4)
+        buffer = self.buffer
+
+        self._lock()
+        try:
+            for page in pages:
+                page_cmd[1] = SET_PAGE_ADDRESS + page
+                self._write(page_cmd)
+
+                # Send from the byte before col_start. For a full row that is
+                # already the 0x40 control byte, otherwise it is borrowed from
+                # the previous column for the length of the transfer.
+                start = page * self.stride + col_start
+                saved = buffer[start]
+                buffer[start] = 0x40 # Co = 0, D/C = 1
+                self._write(buffer, start, start + 1 + col_end - col_start)
+                buffer[start] = saved
+        finally:
+            self.i2c_bus.unlock()
 
 #pylint: disable-msg=too-many-arguments
 class SH1106_SPI(_SH1106):
@@ -254,18 +304,25 @@ class SH1106_SPI(_SH1106):
 
     def write_framebuf(self):
         """write to the frame buffer via SPI"""
+        self.write_pages(range(self.height // 8))
+
+    def write_pages(self, pages, col_start=0, col_end=None):
+        """write a column range of the given pages via SPI"""
+        if col_end is None:
+            col_end = self.width
 
         self.spi_bus.try_lock()
         spi_write = self.spi_bus.write
         write = self.write_cmd
+        column = col_start + 2 # SH1106 RAM is 132 columns, the panel starts at 2
 
-        for page in range(0, 8): # Pages
-            page_mult = (page << 7)
-            write(0xB0 + page) # set page address
-            write(0x02) # set lower column address
-            write(0x10) # set higher column address
+        for page in pages:
+            page_mult = page * self.width
+            write(SET_PAGE_ADDRESS + page) # set page address
+            write(SET_LOW_COLUMN | (column & 0x0F)) # set lower column address
+            write(SET_HIGH_COLUMN | (column >> 4)) # set higher column address
 
             self.dc_pin.value = 1
-            spi_write(self.buffer, start=page_mult, end=page_mult + self.width)
+            spi_write(self.buffer, start=page_mult + col_start, end=page_mult + col_end)
 
         self.spi_bus.unlock()